@@ -0,0 +1,287 @@
+# timetable_app/benchmark.py
+"""Synthetic timetables and a headless benchmark of data_manager and the reminder check.
+
+    python benchmark.py generate --rows 100000 --overlap 0.1 --out bench_data
+    python benchmark.py run --sizes 1000,10000,100000 --save-baseline bench_baseline.json
+    python benchmark.py run --sizes 1000,10000,100000 --baseline bench_baseline.json
+
+Each size runs in its own process (in a scratch directory holding the generated CSVs), so
+caches and peak memory do not leak from one size into the next. Neither Tk nor plyer is
+imported.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Generated timetables start here; the benchmark clock is pinned inside the data
+FIRST_DAY = '2026-01-05'
+
+# Non-overlapping one-hour slots per day, from 08:00
+SLOTS_PER_DAY = 8
+
+# A run is a regression when its median is this many times the baseline median
+REGRESSION_RATIO = 1.25
+
+ROUTINE_DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday', 'Everyday']
+
+
+def _clock_text(minutes):
+    """H:MM strings, unpadded like the hand-written CSVs."""
+    table = np.array([f"{m // 60}:{m % 60:02d}" for m in range(1440)], dtype=object)
+    return table[minutes % 1440]
+
+
+def generate_timetable(directory, rows, routines=20, overlap=0.1, seed=0):
+    """Write lessons_exams.csv and daily_routines.csv with `rows` lessons/exams to directory.
+
+    Lessons fill SLOTS_PER_DAY 50-minute slots a day from FIRST_DAY on. A fraction `overlap`
+    of them is shifted half a slot later so it clashes with its neighbour, which sets the
+    conflict density. The same arguments always produce the same files.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    position = np.arange(rows)
+    day = position // SLOTS_PER_DAY
+    start = 8 * 60 + (position % SLOTS_PER_DAY) * 60 + np.where(rng.random(rows) < overlap, 30, 0)
+    unique_days, day_codes = np.unique(day, return_inverse=True)
+    dates = (pd.Timestamp(FIRST_DAY) + pd.to_timedelta(unique_days, unit='D'))
+    lessons = pd.DataFrame({
+        'Type': np.where(rng.random(rows) < 0.1, 'Exam', 'Lesson'),
+        'Name': np.char.add('Course ', rng.integers(0, 40, rows).astype(str)),
+        'Date': dates.strftime('%Y-%m-%d').to_numpy(dtype=object)[day_codes],
+        'Start_Time': _clock_text(start),
+        'End_Time': _clock_text(start + 50),
+        'Day_of_Week': dates.strftime('%A').to_numpy(dtype=object)[day_codes],
+        'Location': np.char.add('Room ', rng.integers(1, 30, rows).astype(str)),
+        'Notes': '',
+    })
+    lessons.to_csv(os.path.join(directory, 'lessons_exams.csv'), index=False)
+
+    routine_start = rng.integers(6 * 60, 22 * 60, routines)
+    pd.DataFrame({
+        'Name': [f"Routine {i}" for i in range(routines)],
+        'Start_Time': _clock_text(routine_start),
+        'End_Time': _clock_text(routine_start + 30),
+        'Day_of_Week': rng.choice(ROUTINE_DAYS, routines),
+        'Notes': '',
+    }).to_csv(os.path.join(directory, 'daily_routines.csv'), index=False)
+    return int(day[-1]) + 1 if rows else 0
+
+
+def _cases(days, reps):
+    """(name, repetitions, callable taking the repetition number) for every benchmarked call.
+
+    Reads come first so the writes at the end do not change what they measure.
+    """
+    import data_manager as dm
+    import reminders
+
+    first = pd.Timestamp(FIRST_DAY)
+    rng = np.random.default_rng(1)
+    picks = [(first + timedelta(days=int(d))).strftime('%Y-%m-%d') for d in rng.integers(0, max(days, 1), reps)]
+    now = (first + timedelta(days=days // 2, hours=7)).to_pydatetime()
+    lesson_ids, routine_ids = dm.store.lessons()['ID'].tolist(), dm.store.routines()['ID'].tolist()
+    scheduler = reminders.ReminderScheduler(dm.store, sent_file=os.path.abspath('reminders_sent.json'),
+                                            notify=lambda title, message: None)
+
+    def cold_load(_):
+        dm.store.invalidate()
+        dm.load_lessons()
+
+    def check_upcoming(_):
+        scheduler._signature = None  # force the rebuild a timetable change would cause
+        scheduler.refresh(now)
+        scheduler.fire_due(now)
+
+    def week_conflicts(i):
+        end = (datetime.strptime(picks[i], '%Y-%m-%d') + timedelta(days=6)).strftime('%Y-%m-%d')
+        dm.find_conflicts(picks[i], end)
+
+    last_day = (first + timedelta(days=max(days - 1, 0))).strftime('%Y-%m-%d')
+
+    def semester_free_slots(_):
+        dm.store._busy = {}  # force the full rebuild a reload would cause
+        dm.find_free_slots(FIRST_DAY, last_day, 60)
+
+    few = max(reps // 10, 3)
+    return [
+        ('load_lessons (cold)', few, cold_load),
+        ('load_lessons', reps, lambda i: dm.load_lessons()),
+        ('load_routines', reps, lambda i: dm.load_routines()),
+        ('get_daily_schedule', reps, lambda i: dm.get_daily_schedule(picks[i])),
+        ('get_weekly_schedule', reps, lambda i: dm.get_weekly_schedule(picks[i])),
+        ('get_range_schedule', reps, lambda i: dm.get_range_schedule(picks[i], picks[-1 - i])),
+        ('get_semester_schedule', few, lambda i: dm.get_semester_schedule()),
+        ('get_upcoming_events', reps, lambda i: dm.get_upcoming_events()),
+        ('query_entries', reps, lambda i: dm.query_entries('lesson/exam', search='Course 1', offset=i * 10)),
+        ('get_timed_events', reps, lambda i: dm.get_timed_events(picks[i], picks[i])),
+        ('check_conflicts', reps, lambda i: dm.check_conflicts(picks[i])),
+        ('find_conflicts (week)', reps, week_conflicts),
+        ('find_conflicts (all)', few, lambda i: dm.find_conflicts()),
+        ('find_free_slots (week)', reps, lambda i: dm.find_free_slots(picks[i], None, 60)),
+        ('find_free_slots (all, cold)', few, semester_free_slots),
+        ('check_upcoming', reps, check_upcoming),
+        ('validate_lessons', few, lambda i: dm.validate_lessons(dm.store.lessons())),
+        ('add_lesson_exam', reps, lambda i: dm.add_lesson_exam('Lesson', f'Bench {i}', picks[i], '20:00', '20:50', 'Lab', '')),
+        ('add_routine', reps, lambda i: dm.add_routine(f'Bench {i}', '21:00', '21:30', 'Monday', '')),
+        ('edit_lesson_exam', reps, lambda i: dm.edit_lesson_exam(lesson_ids[i % len(lesson_ids)], {'Notes': f'edited {i}'})),
+        ('edit_routine', reps, lambda i: dm.edit_routine(routine_ids[0], {'Notes': f'edited {i}'})),
+        ('update_many (100)', few, lambda i: dm.update_many('lesson/exam', {
+            entry_id: {'Notes': f'batch {i}'} for entry_id in lesson_ids[i * 100 % len(lesson_ids):][:100]})),
+        ('delete_lesson_exam', reps, lambda i: dm.delete_lesson_exam(dm.store.lessons()['ID'].iat[-1])),
+        ('delete_routine', reps, lambda i: dm.delete_routine(dm.store.routines()['ID'].iat[-1])),
+        ('delete_many (100)', few, lambda i: dm.delete_many('lesson/exam', dm.store.lessons()['ID'].iloc[-100:].tolist())),
+        ('save_lessons', few, lambda i: dm.save_lessons(dm.store.lessons())),
+    ]
+
+
+def _measure(fn, reps):
+    timings = []
+    for i in range(reps):
+        started = time.perf_counter_ns()
+        fn(i)
+        timings.append(time.perf_counter_ns() - started)
+    # One extra call under tracemalloc, which would distort the timings above
+    tracemalloc.start()
+    fn(0)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    ms = np.array(timings) / 1e6
+    return {
+        'reps': reps,
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+        'peak_kb': peak / 1024,
+    }
+
+
+def run_size(rows, overlap=0.1, reps=50, backend='csv'):
+    """Generate a timetable of `rows` lessons in a scratch directory and time every case there.
+
+    Must run in a fresh process: data_manager binds its files to the working directory on import.
+    """
+    workdir = tempfile.mkdtemp(prefix='timetable-bench-')
+    try:
+        days = generate_timetable(workdir, rows, overlap=overlap)
+        os.chdir(workdir)
+        os.environ['TIMETABLE_BACKEND'] = backend
+        if backend == 'sqlite':
+            import data_manager as dm
+            dm.migrate_csv_to_sqlite()
+        results = {name: _measure(fn, count) for name, count, fn in _cases(days, reps)}
+        if resource is not None:
+            results['process'] = {'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+        return results
+    finally:
+        os.chdir(tempfile.gettempdir())
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run(sizes, overlap=0.1, reps=50, backend='csv'):
+    """{size: {case: stats}} with every size measured in a separate interpreter."""
+    results = {}
+    for rows in sizes:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), 'run-size', str(rows),
+             '--overlap', str(overlap), '--reps', str(reps), '--backend', backend],
+            check=True, capture_output=True, text=True).stdout
+        results[str(rows)] = json.loads(output)
+    return results
+
+
+def compare(results, baseline, ratio=REGRESSION_RATIO):
+    """Lines describing every case whose median got more than `ratio` times slower."""
+    regressions = []
+    for size, cases in results.items():
+        for name, stats in cases.items():
+            before = baseline.get(size, {}).get(name, {}).get('p50_ms')
+            if before and 'p50_ms' in stats and stats['p50_ms'] > before * ratio:
+                regressions.append(f"{size} rows, {name}: p50 {stats['p50_ms']:.2f} ms "
+                                   f"(baseline {before:.2f} ms, x{stats['p50_ms'] / before:.2f})")
+    return regressions
+
+
+def format_results(results):
+    lines = []
+    for size, cases in results.items():
+        lines.append(f"\n{int(size):,} rows")
+        lines.append(f"  {'case':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KB':>12}")
+        for name, stats in cases.items():
+            if name == 'process':
+                lines.append(f"  max RSS {stats['max_rss_kb'] / 1024:.1f} MB")
+                continue
+            lines.append(f"  {name:<24}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                         f"{stats['p99_ms']:>10.2f}{stats['peak_kb']:>12.0f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='write synthetic CSVs')
+    generate.add_argument('--rows', type=int, default=10_000)
+    generate.add_argument('--routines', type=int, default=20)
+    generate.add_argument('--overlap', type=float, default=0.1)
+    generate.add_argument('--seed', type=int, default=0)
+    generate.add_argument('--out', default='bench_data')
+
+    bench = commands.add_parser('run', help='time every case at each size')
+    bench.add_argument('--sizes', default='1000,10000,100000',
+                       help='comma-separated lesson counts (up to 1000000)')
+    bench.add_argument('--overlap', type=float, default=0.1)
+    bench.add_argument('--reps', type=int, default=50)
+    bench.add_argument('--backend', choices=['csv', 'sqlite'], default='csv')
+    bench.add_argument('--baseline', help='compare against this JSON; exit 1 on regressions')
+    bench.add_argument('--save-baseline', help='write the results to this JSON')
+    bench.add_argument('--ratio', type=float, default=REGRESSION_RATIO)
+
+    one = commands.add_parser('run-size')  # used by `run`, one process per size
+    one.add_argument('rows', type=int)
+    one.add_argument('--overlap', type=float, default=0.1)
+    one.add_argument('--reps', type=int, default=50)
+    one.add_argument('--backend', default='csv')
+
+    args = parser.parse_args(argv)
+    if args.command == 'generate':
+        generate_timetable(args.out, args.rows, args.routines, args.overlap, args.seed)
+        print(f"Wrote {args.rows} lessons and {args.routines} routines to {args.out}")
+    elif args.command == 'run-size':
+        json.dump(run_size(args.rows, args.overlap, args.reps, args.backend), sys.stdout)
+    else:
+        sizes = [int(size) for size in args.sizes.split(',')]
+        results = run(sizes, args.overlap, args.reps, args.backend)
+        print(format_results(results))
+        if args.save_baseline:
+            with open(args.save_baseline, 'w') as f:
+                json.dump(results, f, indent=2)
+        if args.baseline:
+            with open(args.baseline) as f:
+                regressions = compare(results, json.load(f), args.ratio)
+            for line in regressions:
+                print(f"REGRESSION {line}")
+            return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+# timetable_app/cli.py
+"""Command-line interface: quick queries, adding entries and the headless reminder daemon.
+
+    python main.py next [-n 5]
+    python main.py day [YYYY-MM-DD]
+    python main.py week [YYYY-MM-DD]
+    python main.py conflicts [START] [END] [--workspace DIR]
+    python main.py free DURATION [START] [END] [--earliest HH:MM] [--latest HH:MM] [--days D,D] [--buffer MIN] [--workspace DIR]
+    python main.py add lesson|exam NAME DATE START END [--location L] [--notes N] [--repeat RULE]
+    python main.py add routine NAME START END DAY [--notes N]
+    python main.py remind [--once]
+
+`next` reads the timetable with the standard library only (csv/json/sqlite3), so it answers
+without importing pandas; every other command loads data_manager when it runs.
+"""
+
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import os
+import sys
+from datetime import date, datetime
+from config import (DATABASE_FILE, LESSON_COLUMNS, LESSONS_FILE, ROUTINE_COLUMNS, ROUTINES_FILE,
+                    STORAGE_BACKEND, WEEKDAYS)
+from recurrence import EPOCH, day_number, day_text, parse_minutes, parse_rule, weekday
+
+# Routine occurrences looked at by `next`; one-off lessons are searched without a limit,
+# repeating ones up to a year ahead
+NEXT_HORIZON_DAYS = 7
+NEXT_REPEAT_DAYS = 366
+
+
+def _day(value):
+    try:
+        return day_number(value)
+    except ValueError:
+        return None
+
+
+def _read_csv_table(path, columns):
+    """Rows of a CSV table as dicts, with its journal replayed (see storage.CsvTableStorage)."""
+    try:
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+    except FileNotFoundError:
+        rows = []
+    try:
+        with open(path + '.journal') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return rows
+    try:
+        base = json.loads(lines[0]).get('base') or ()
+        current = os.stat(path)
+    except (IndexError, ValueError, FileNotFoundError):
+        return rows
+    if tuple(base) != (current.st_mtime_ns, current.st_size):
+        return rows  # stale journal, ignored like storage.py does
+    by_id, deleted = None, set()
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            break
+        if record['op'] == 'add':
+            added = [{column: row.get(column) for column in columns} for row in record['rows']]
+            rows.extend(added)
+            if by_id is not None:
+                by_id.update((row['ID'], row) for row in added)
+        elif 'index' in record:  # journals from before entries had IDs
+            if record['op'] == 'edit':
+                rows[record['index']].update(record['updates'])
+            elif record['op'] == 'delete':
+                del rows[record['index']]
+        else:
+            if by_id is None:
+                by_id = {row.get('ID'): row for row in rows}
+            if record['op'] == 'edit':
+                for entry_id, updates in zip(record['ids'], record['updates']):
+                    by_id[entry_id].update(updates)
+            elif record['op'] == 'delete':
+                deleted.update(record['ids'])
+    if deleted:
+        rows = [row for row in rows if row.get('ID') not in deleted]
+    return rows
+
+
+def _rule(value):
+    try:
+        return parse_rule(value)
+    except ValueError:
+        return None  # treated as a one-off lesson, as data_manager does
+
+
+def _occurrences(row, day, start, now_minutes):
+    """Events of a repeating lesson from now until NEXT_REPEAT_DAYS ahead."""
+    today = int(now_minutes) // 1440
+    for occurrence in _rule(row.get('Repeat')).occurrences(day, today, today + NEXT_REPEAT_DAYS):
+        if occurrence * 1440 + start >= now_minutes:
+            when = day_text(occurrence)
+            yield occurrence * 1440 + start, row.get('Type'), row.get('Name'), when, row.get('Start_Time'), row.get('Location')
+
+
+def _lesson_events(now_minutes, limit):
+    """(start minutes since the epoch, type, name, date, start, location) for lessons from now on.
+
+    SQLite returns the first `limit` one-off lessons in order straight from its date index; the
+    CSV has to be scanned in full.
+    """
+    if STORAGE_BACKEND == 'sqlite':
+        import sqlite3
+        conn = sqlite3.connect(DATABASE_FILE)
+        today, minute = divmod(int(now_minutes), 1440)
+        columns = 'Type, Name, Date, Start_Time, Location'
+        try:
+            rows = conn.execute(
+                f"SELECT _Date, _Start, {columns} FROM lessons WHERE (_Date > ? OR (_Date = ? AND _Start >= ?)) "
+                "AND COALESCE(Repeat, '') = '' ORDER BY _Date, _Start LIMIT ?", (today, today, minute, limit))
+            for day, start, *fields in rows:
+                if start is not None:
+                    yield (day * 1440 + start, *fields)
+            repeating = conn.execute(f"SELECT _Date, _Start, {columns}, Repeat FROM lessons "
+                                     "WHERE COALESCE(Repeat, '') != '' AND _Date IS NOT NULL AND _Start IS NOT NULL")
+            for day, start, *fields in repeating.fetchall():
+                row = dict(zip(['Type', 'Name', 'Date', 'Start_Time', 'Location', 'Repeat'], fields))
+                if _rule(row['Repeat']) is not None:
+                    yield from _occurrences(row, day, start, now_minutes)
+        except sqlite3.OperationalError:
+            return  # no database yet
+        finally:
+            conn.close()
+        return
+    for row in _read_csv_table(LESSONS_FILE, LESSON_COLUMNS):
+        day, start = _day(row.get('Date')), parse_minutes(row.get('Start_Time'))
+        if day is None or start is None:
+            continue
+        if row.get('Repeat') and _rule(row['Repeat']) is not None:
+            yield from _occurrences(row, day, start, now_minutes)
+        elif day * 1440 + start >= now_minutes:
+            yield day * 1440 + start, row.get('Type'), row.get('Name'), row.get('Date'), row.get('Start_Time'), row.get('Location')
+
+
+def _routine_events(now_minutes, horizon_days=NEXT_HORIZON_DAYS):
+    if STORAGE_BACKEND == 'sqlite':
+        import sqlite3
+        conn = sqlite3.connect(DATABASE_FILE)
+        try:
+            rows = [dict(zip(ROUTINE_COLUMNS, row)) for row in
+                    conn.execute(f"SELECT {', '.join(ROUTINE_COLUMNS)} FROM routines")]
+        except sqlite3.OperationalError:
+            rows = []
+        finally:
+            conn.close()
+    else:
+        rows = _read_csv_table(ROUTINES_FILE, ROUTINE_COLUMNS)
+    today = int(now_minutes) // 1440
+    for row in rows:
+        start = parse_minutes(row.get('Start_Time'))
+        if start is None:
+            continue
+        for day in range(today, today + horizon_days + 1):
+            if row.get('Day_of_Week') in (WEEKDAYS[weekday(day)], 'Everyday') and day * 1440 + start >= now_minutes:
+                yield day * 1440 + start, 'Routine', row.get('Name'), day_text(day), row.get('Start_Time'), ''
+
+
+def upcoming(count=5, now=None):
+    """The next `count` lessons, exams and routine occurrences starting at or after now."""
+    now = now or datetime.now()
+    now_minutes = (now.date() - EPOCH).days * 1440 + now.hour * 60 + now.minute
+    events = itertools.chain(_lesson_events(now_minutes, count), _routine_events(now_minutes))
+    return heapq.nsmallest(count, events, key=lambda event: event[0])
+
+
+def cmd_next(args):
+    events = upcoming(args.count)
+    if not events:
+        print("Nothing coming up.")
+    for _, kind, name, when, start, location in events:
+        weekday = WEEKDAYS[datetime.strptime(when, '%Y-%m-%d').weekday()][:3]
+        place = f"  ({location})" if location else ""
+        print(f"{when} {weekday} {start:>5}  {kind:<7} {name}{place}")
+
+
+def cmd_day(args):
+    from data_manager import get_daily_schedule
+    lessons, routines = get_daily_schedule(args.date)
+    print("Lessons/Exams:\n" + lessons.to_string() + "\n\nRoutines:\n" + routines.to_string())
+
+
+def cmd_week(args):
+    from data_manager import get_weekly_schedule
+    for day, (lessons, routines) in get_weekly_schedule(args.date).items():
+        print(f"{day}:\nLessons/Exams:\n{lessons.to_string() if not lessons.empty else 'None'}\n"
+              f"Routines:\n{routines.to_string() if not routines.empty else 'None'}\n")
+
+
+def cmd_conflicts(args):
+    if args.workspace:
+        from workspace import Workspace
+        # Printed as each timetable's scan comes back from the process pool
+        for name, conflicts, error in Workspace(args.workspace).scan_conflicts(args.start, args.end or args.start):
+            if error:
+                print(f"== {name}: {error}", file=sys.stderr)
+            elif not conflicts.empty:
+                print(f"== {name}: {len(conflicts)} conflict(s)\n{conflicts.to_string(index=False)}")
+        return
+    from data_manager import find_conflicts
+    conflicts = find_conflicts(args.start, args.end or args.start)
+    print(conflicts.to_string(index=False) if not conflicts.empty else "No conflicts.")
+
+
+def cmd_free(args):
+    constraints = {'earliest': args.earliest, 'latest': args.latest, 'weekdays': args.days, 'buffer': args.buffer}
+    if args.workspace:
+        from workspace import Workspace
+        slots = Workspace(args.workspace).find_free_slots(args.start, args.end, args.duration, constraints)
+    else:
+        from data_manager import find_free_slots
+        slots = find_free_slots(args.start, args.end, args.duration, constraints)
+    print(slots.to_string(index=False) if not slots.empty else "No free slot that long.")
+
+
+def cmd_add(args):
+    from data_manager import add_lesson_exam, add_routine, store
+    if args.kind == 'routine':
+        if len(args.fields) != 4:
+            raise ValueError("add routine expects NAME START END DAY.")
+        add_routine(*args.fields, args.notes)
+    else:
+        if len(args.fields) != 4:
+            raise ValueError(f"add {args.kind} expects NAME DATE START END.")
+        add_lesson_exam(args.kind, *args.fields, args.location, args.notes, args.repeat)
+    store.compact()  # a one-shot process: leave the CSVs self-contained
+    print(f"Added {args.kind} {args.fields[0]}.")
+
+
+def cmd_remind(args):
+    from reminders import check_reminders, check_upcoming
+    if args.once:
+        check_upcoming()
+    else:
+        check_reminders()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='timetable', description="Timetable from the command line.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    today = date.today().isoformat()
+
+    command = commands.add_parser('next', help='the next few events')
+    command.add_argument('-n', '--count', type=int, default=5)
+    command.set_defaults(run=cmd_next)
+
+    command = commands.add_parser('day', help="one day's schedule")
+    command.add_argument('date', nargs='?', default=today)
+    command.set_defaults(run=cmd_day)
+
+    command = commands.add_parser('week', help='seven days from a date')
+    command.add_argument('date', nargs='?', default=today)
+    command.set_defaults(run=cmd_week)
+
+    command = commands.add_parser('conflicts', help='overlapping events (whole timetable by default)')
+    command.add_argument('start', nargs='?')
+    command.add_argument('end', nargs='?')
+    command.add_argument('--workspace', metavar='DIR', help='scan every timetable under DIR in parallel')
+    command.set_defaults(run=cmd_conflicts)
+
+    command = commands.add_parser('free', help='free slots of at least DURATION (minutes or H:MM), a week from START by default')
+    command.add_argument('duration')
+    command.add_argument('start', nargs='?', default=today)
+    command.add_argument('end', nargs='?')
+    command.add_argument('--earliest', help='start of the day to search (default 08:00)')
+    command.add_argument('--latest', help='end of the day to search (default 22:00)')
+    command.add_argument('--days', help='weekdays to search, e.g. Mon,Tue,Thu')
+    command.add_argument('--buffer', help='minutes to keep free around every event')
+    command.add_argument('--workspace', metavar='DIR', help='slots free in every timetable under DIR')
+    command.set_defaults(run=cmd_free)
+
+    command = commands.add_parser('add', help='add a lesson, exam or routine')
+    command.add_argument('kind', choices=['lesson', 'exam', 'routine'])
+    command.add_argument('fields', nargs='+', help='NAME DATE START END, or NAME START END DAY for routines')
+    command.add_argument('--location', default='')
+    command.add_argument('--notes', default='')
+    command.add_argument('--repeat', default='', help="lessons/exams: e.g. 'weekly;BYDAY=MO,WE;UNTIL=2026-05-01'")
+    command.set_defaults(run=cmd_add)
+
+    command = commands.add_parser('remind', help='run the reminder loop without the GUI')
+    command.add_argument('--once', action='store_true', help='send what is due now and exit')
+    command.set_defaults(run=cmd_remind)
+
+    args = parser.parse_args(argv)
+    try:
+        args.run(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,19 @@
+# timetable_app/config.py
+# File names and table layouts, kept free of heavy imports so the CLI can start fast
+
+import os
+
+LESSONS_FILE = 'lessons_exams.csv'
+ROUTINES_FILE = 'daily_routines.csv'
+DATABASE_FILE = 'timetable.db'
+
+# 'csv' (default) or 'sqlite'; see storage.py
+STORAGE_BACKEND = os.environ.get('TIMETABLE_BACKEND', 'csv')
+
+# Repeat holds an optional recurrence rule (see recurrence.py); Date is then the first occurrence.
+# ID is the entry's permanent key, assigned by data_manager when a row is added
+LESSON_COLUMNS = ['Type', 'Name', 'Date', 'Start_Time', 'End_Time', 'Day_of_Week', 'Location', 'Notes', 'Repeat', 'ID']
+ROUTINE_COLUMNS = ['Name', 'Start_Time', 'End_Time', 'Day_of_Week', 'Notes', 'ID']
+
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
@@ -1,123 +1,1308 @@
 # timetable_app/data_manager.py
 
+import os
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-import os
+import threading
+from config import (DATABASE_FILE, LESSON_COLUMNS, LESSONS_FILE, ROUTINE_COLUMNS, ROUTINES_FILE,
+                    STORAGE_BACKEND, WEEKDAYS)
+from instrumentation import count, span, timed
+from recurrence import day_number, parse_minutes, parse_rule, weekday
+from storage import CsvBackend, SqliteBackend
+
+
+def _parse_dates(values):
+    """datetime64[D] array for a column of YYYY-MM-DD strings (single-digit month/day allowed);
+    NaT where a date is missing or invalid."""
+    # Timetables repeat the same few hundred dates and times, so parse each distinct value once
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format='%Y-%m-%d', errors='coerce')
+    parsed = np.append(parsed.to_numpy().astype('datetime64[D]'), np.datetime64('NaT', 'D'))
+    return parsed[codes]  # code -1 (missing) picks the trailing NaT
+
+
+def _parse_times(values):
+    """int16 minutes since midnight for a column of H:MM strings; -1 where a time is missing or invalid."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    parsed = np.full(len(uniques) + 1, -1, dtype=np.int16)
+    for i, value in enumerate(uniques):
+        minutes = parse_minutes(value)
+        if minutes is not None:
+            parsed[i] = minutes
+    return parsed[codes]
+
+
+def _day_numbers(dates):
+    """Days since the epoch for a datetime64[D] array; -1 for NaT."""
+    days = dates.astype(np.int64)
+    days[np.isnat(dates)] = -1
+    return days
+
+
+def _normalize_date(date):
+    try:
+        return datetime.strptime(str(date).strip(), '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"Invalid date '{date}', expected YYYY-MM-DD.") from None
+
+
+def _normalize_time(value):
+    minutes = parse_minutes(value)
+    if minutes is None:
+        raise ValueError(f"Invalid time '{value}', expected HH:MM (24-hour).")
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _normalize_repeat(value):
+    rule = parse_rule(value)
+    return '' if rule is None else str(rule)
+
+
+def _normalize_weekday(value):
+    day = str(value).strip().capitalize()
+    if day not in WEEKDAYS and day != 'Everyday':
+        raise ValueError(f"Invalid day of week '{value}', expected e.g. Monday or Everyday.")
+    return day
+
+
+# Typed columns parsed once per load and kept alongside each table: name -> (CSV column, parser)
+LESSON_TYPED = {'Date': ('Date', _parse_dates), 'Start': ('Start_Time', _parse_times), 'End': ('End_Time', _parse_times)}
+ROUTINE_TYPED = {'Start': ('Start_Time', _parse_times), 'End': ('End_Time', _parse_times)}
+
+
+# Rules without UNTIL/COUNT are expanded this many days past the start of an open-ended query
+OPEN_ENDED_DAYS = 366
+
+_NO_END = np.iinfo(np.int64).max
+
+# pandas 3 always copies on write, so a shallow copy is enough to edit a frame privately
+_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+
+def _parse_rules(values):
+    """Rule (or None) per Repeat value; values that fail to parse count as not repeating."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    rules = []
+    for value in uniques:
+        try:
+            rules.append(parse_rule(value))
+        except ValueError:
+            rules.append(None)
+    return np.array(rules + [None], dtype=object)[codes]
+
+
+class _DateIndex:
+    """Row positions of the lessons table sorted by Date then start time, for binary-search
+    range slices.
+
+    Repeating lessons (a rule in Repeat) are ordered by their first date too, but slice()
+    leaves them out; occurrences() expands them over a window instead.
+    """
+
+    columns = ('Date', 'Start_Time', 'Repeat')
+
+    def __init__(self, df, typed):
+        days = _day_numbers(typed['Date'])
+        sort_keys = days * 1440 + typed['Start']
+        valid = np.flatnonzero(days >= 0)
+        order = valid[np.argsort(sort_keys[valid], kind='stable')]
+        self.keys = days[order]
+        self.sort_keys = sort_keys[order]
+        self.order = order
+        self.undated = np.flatnonzero(days < 0)
+        self.repeating = np.zeros(0, dtype=bool)
+        self.rules, self.rule_positions = [], np.zeros(0, dtype=np.int64)
+        self.rule_first, self.rule_last = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        self._add_rules(df, 0, days)
+
+    def _add_rules(self, rows, start, days):
+        rules = _parse_rules(rows['Repeat']) if 'Repeat' in rows else np.full(len(rows), None, dtype=object)
+        repeating = (rules != None) & (days >= 0)  # noqa: E711 - elementwise comparison
+        self.repeating = np.concatenate([self.repeating, repeating])
+        found = np.flatnonzero(repeating)
+        if not len(found):
+            return
+        first = days[found]
+        last = [rule.last_day(int(day)) for rule, day in zip(rules[found], first)]
+        self.rules.extend(rules[found])
+        self.rule_positions = np.concatenate([self.rule_positions, found + start])
+        self.rule_first = np.concatenate([self.rule_first, first])
+        self.rule_last = np.concatenate([self.rule_last, [_NO_END if day is None else day for day in last]])
+
+    def extend(self, rows, start, typed):
+        days = _day_numbers(typed['Date'])
+        sort_keys = days * 1440 + typed['Start']
+        positions = np.arange(start, start + len(days))
+        valid = days >= 0
+        sort = np.argsort(sort_keys[valid], kind='stable')
+        new_days, new_keys, new_positions = days[valid][sort], sort_keys[valid][sort], positions[valid][sort]
+        at = np.searchsorted(self.sort_keys, new_keys, side='right')
+        self.keys = np.insert(self.keys, at, new_days)
+        self.sort_keys = np.insert(self.sort_keys, at, new_keys)
+        self.order = np.insert(self.order, at, new_positions)
+        self.undated = np.concatenate([self.undated, positions[~valid]])
+        self._add_rules(rows, start, days)
+
+    def slice_bounds(self, start_day=None, end_day=None):
+        """slice() of self.order covering every row with start_day <= Date <= end_day."""
+        lo = 0 if start_day is None else np.searchsorted(self.keys, start_day, side='left')
+        hi = len(self.keys) if end_day is None else np.searchsorted(self.keys, end_day, side='right')
+        return slice(lo, hi)
+
+    def slice(self, start_day=None, end_day=None):
+        """Positions of one-off rows with start_day <= Date <= end_day, in date/start order."""
+        positions = self.order[self.slice_bounds(start_day, end_day)]
+        return positions[~self.repeating[positions]] if len(self.rules) else positions
+
+    def occurrences(self, start_day=None, end_day=None):
+        """(positions, days) of every occurrence of a repeating row within start_day..end_day.
+
+        An open end stops each never-ending rule OPEN_ENDED_DAYS after the later of its first
+        day and start_day. Only rules whose span meets the window are expanded, each from the
+        window start, so the cost follows the window rather than the length of the series.
+        """
+        lo = -_NO_END if start_day is None else start_day
+        hi = _NO_END if end_day is None else end_day
+        candidates = np.flatnonzero((self.rule_first <= hi) & (self.rule_last >= lo))
+        positions, days = [], []
+        for i in candidates:
+            first = int(self.rule_first[i])
+            stop = end_day if end_day is not None else min(int(self.rule_last[i]), max(first, lo) + OPEN_ENDED_DAYS)
+            found = list(self.rules[i].occurrences(first, max(first, lo), stop))
+            positions.extend([self.rule_positions[i]] * len(found))
+            days.extend(found)
+        return np.array(positions, dtype=np.int64), np.array(days, dtype=np.int64)
+
+    def span(self):
+        """(first_day, last_day) over all dated rows and occurrences, or None when there are none."""
+        if not len(self.keys):
+            return None
+        last = int(self.keys[-1])
+        if len(self.rules):
+            ends = np.where(self.rule_last == _NO_END, self.rule_first + OPEN_ENDED_DAYS, self.rule_last)
+            last = max(last, int(ends.max()))
+        return int(self.keys[0]), last
+
+
+class _WeekdayIndex:
+    """Row positions of the routines table keyed by Day_of_Week, with Everyday rows merged in."""
+
+    columns = ('Day_of_Week',)
+
+    def __init__(self, df, typed):
+        self.positions = {}
+        self.extend(df, 0, typed)
+
+    def extend(self, rows, start, typed):
+        for offset, day in enumerate(rows['Day_of_Week']):
+            self.positions.setdefault(day, []).append(start + offset)
+
+    def on(self, weekday):
+        return sorted(self.positions.get(weekday, []) + self.positions.get('Everyday', []))
+
+
+def _new_ids(n):
+    """n random 64-bit entry IDs as 16-digit hex strings."""
+    text = os.urandom(8 * n).hex()
+    return [text[i:i + 16] for i in range(0, 16 * n, 16)]
+
+
+def _fill_ids(df, check_duplicates=True):
+    """df with a fresh ID on every row whose ID is missing or repeats an earlier row's, and
+    whether any had to be assigned (rows from before IDs existed, or copied by hand)."""
+    ids = df['ID']
+    missing = ids.isna() | (ids == '')
+    if check_duplicates:
+        missing |= ids.duplicated()
+    missing = missing.to_numpy()
+    if not missing.any():
+        return df, False
+    df = df.copy()
+    df['ID'] = df['ID'].astype(object)
+    df.loc[missing, 'ID'] = _new_ids(int(missing.sum()))
+    return df, True
+
+
+class _IdIndex:
+    """Row position of every ID, kept current through adds and deletes without a rebuild.
+
+    The dict holds each ID's position as of when it was added; rows deleted since are kept
+    as a sorted array of those original positions, so a row's current position is its
+    original one less the deletions before it (a binary search).
+    """
+
+    def __init__(self, ids):
+        self.original = dict(zip(ids, range(len(ids))))
+        self.size = len(ids)
+        self.removed = np.zeros(0, dtype=np.int64)
+
+    def extend(self, ids):
+        self.original.update(zip(ids, range(self.size, self.size + len(ids))))
+        self.size += len(ids)
+
+    def get(self, entry_id):
+        original = self.original.get(entry_id)
+        if original is None or not len(self.removed):
+            return original
+        return original - int(np.searchsorted(self.removed, original))
+
+    def remove(self, ids):
+        removed = [self.original.pop(entry_id) for entry_id in ids]
+        self.removed = np.sort(np.concatenate([self.removed, removed]).astype(np.int64))
+
+
+class _Table:
+    """In-memory copy of one table with its typed columns and index, persisted via a storage
+    object from storage.py (CSV + journal, or SQLite).
+
+    Rows are addressed by their ID column through an _IdIndex, built on first use.
+    """
+
+    def __init__(self, storage, columns, typed_columns, index_type):
+        self.storage = storage
+        self.columns = columns
+        self.typed_columns = typed_columns
+        self.index_type = index_type
+        self.signature = None
+        self.df = None
+        self.pending = []  # row dicts / DataFrames added since df was last materialized
+        self._typed = None
+        self._index = None
+        self._ids = None
+        self.generation = 0  # bumped whenever the rows are replaced wholesale (load/replace)
+
+    def current_signature(self):
+        return self.storage.signature()
+
+    def load(self):
+        with span('storage.read'):
+            df, typed, records, mapped = self.storage.read()
+        if list(df.columns) != self.columns:
+            df = df.reindex(columns=self.columns)  # e.g. a CSV from before a column was added
+        count('rows_read', len(df))
+        self.df, self.pending, self._typed, self._index, self._ids = df, [], typed, None, None
+        self.generation += 1
+        for record in records:
+            self._apply(record)
+        self.signature = self.current_signature()
+        # A snapshot that was already there is only kept for a frame whose IDs the load that
+        # wrote it went on to check, so only a mapped one can skip the duplicate check
+        df, assigned = _fill_ids(self.frame(), check_duplicates=not mapped)
+        if assigned:
+            self.replace(df)  # persist them once, so they stay the same from now on
+
+    def frame(self):
+        if self.pending:
+            start = len(self.df)
+            chunks, run = [], []
+            for item in self.pending:
+                if isinstance(item, pd.DataFrame):
+                    if run:
+                        chunks.append(pd.DataFrame(run, columns=self.columns))
+                        run = []
+                    chunks.append(item[self.columns])
+                else:
+                    run.append(item)
+            if run:
+                chunks.append(pd.DataFrame(run, columns=self.columns))
+            rows = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0].reset_index(drop=True)
+            self.df = pd.concat([self.df, rows], ignore_index=True)
+            self.pending = []
+            if self._ids is not None:
+                self._ids.extend(rows['ID'].to_numpy(dtype=object))
+            if self._typed is not None:
+                typed_rows = self._parse(rows)
+                self._typed = {name: np.concatenate([self._typed[name], values]) for name, values in typed_rows.items()}
+                if self._index is not None:
+                    self._index.extend(rows, start, typed_rows)
+        return self.df
+
+    def _parse(self, df):
+        return {name: parser(df[column]) for name, (column, parser) in self.typed_columns.items()}
+
+    def typed(self):
+        """Typed arrays (see LESSON_TYPED/ROUTINE_TYPED) aligned with the rows of frame()."""
+        df = self.frame()
+        if self._typed is None:
+            with span('parse_typed'):
+                self._typed = self._parse(df)
+        return self._typed
+
+    def index(self):
+        if self._index is None:
+            typed = self.typed()
+            self._index = self.index_type(self.df, typed)
+        return self._index
+
+    def positions(self, ids, missing_ok=False):
+        """Row positions of the given IDs; raises ValueError for an unknown one unless
+        missing_ok, which skips it."""
+        df = self.frame()
+        if self._ids is None:
+            self._ids = _IdIndex(df['ID'].to_numpy(dtype=object))
+        found = []
+        for entry_id in ids:
+            position = self._ids.get(entry_id)
+            if position is None:
+                if missing_ok:
+                    continue
+                raise ValueError(f"No entry with ID '{entry_id}', it may have been deleted.")
+            found.append(position)
+        return found
+
+    def _targets(self, record):
+        # Journals written before entries had IDs address a row by position
+        if 'index' in record:
+            if record['index'] not in self.frame().index:
+                raise KeyError(record['index'])
+            return [record['index']]
+        return self.positions(record['ids'])
+
+    def _apply(self, record):
+        op = record['op']
+        if op == 'add':
+            rows = record['rows']
+            if isinstance(rows, pd.DataFrame):
+                self.pending.append(rows)
+            else:
+                self.pending.extend(rows)
+            return
+        positions = self._targets(record)
+        df = self.frame()
+        if op == 'edit':
+            # Frames already handed out must not change; with copy-on-write only the edited
+            # columns get copied, else the whole frame, once per record however many rows it edits
+            df = df.copy(deep=not _COPY_ON_WRITE)
+            updates = [record['updates']] if 'index' in record else record['updates']
+            changed = {}  # column -> (positions, values)
+            for position, row_updates in zip(positions, updates):
+                for key, value in row_updates.items():
+                    if key not in changed and df[key].dtype.kind in 'biuf':
+                        df[key] = df[key].astype(object)  # e.g. an all-empty Notes column read as float
+                    df.at[position, key] = value
+                    changed.setdefault(key, ([], []))
+                    changed[key][0].append(position)
+                    changed[key][1].append(value)
+            if self._typed is not None:
+                typed = dict(self._typed)
+                for name, (column, parser) in self.typed_columns.items():
+                    if column in changed:
+                        typed[name] = typed[name].copy()
+                        typed[name][changed[column][0]] = parser(changed[column][1])
+                self._typed = typed
+            if set(changed) & set(self.index_type.columns):
+                self._index = None
+        elif op == 'delete':
+            if self._ids is not None:
+                self._ids.remove(df['ID'].to_numpy(dtype=object)[positions])
+            df = df.drop(positions).reset_index(drop=True)
+            if self._typed is not None:
+                self._typed = {name: np.delete(values, positions) for name, values in self._typed.items()}
+            self._index = None
+        self.df = df
+
+    def write(self, record):
+        # Apply in memory first so an unknown ID fails before anything reaches disk
+        previous = self.df, list(self.pending), self._typed, self._index
+        self._apply(record)
+        try:
+            self.storage.append(record)
+        except Exception:
+            self.df, self.pending, self._typed, self._index = previous
+            self._ids = None  # updated in place by the delete; rebuilt on next use
+            raise
+        if self.storage.needs_compaction():
+            self.compact()
+        else:
+            self.signature = self.current_signature()
+
+    def replace(self, df):
+        df, _ = _fill_ids(df.reindex(columns=self.columns))
+        typed = self.storage.replace(df)  # parsed while writing, so not parsed again
+        self.df, self.pending, self._typed, self._index, self._ids = df, [], typed, None, None
+        self.generation += 1
+        self.signature = self.current_signature()
+
+    def unload(self):
+        """Forget the in-memory copy (it is read again on next use)."""
+        self.df, self.pending, self._typed, self._index, self._ids = None, [], None, None, None
+
+    def compact(self):
+        # Same rows in the same order, so whatever was derived from them still holds
+        index, ids, generation = self._index, self._ids, self.generation
+        self.replace(self.frame())
+        self._index, self._ids, self.generation = index, ids, generation
+
+
+class TimetableStore:
+    """Keeps both timetable tables in memory and re-reads one only when it changes on disk.
+
+    The frames handed out by lessons()/routines() are shared, so callers must not modify them
+    in place; load_lessons()/load_routines() return copies for code that wants to.
+    Mutations go through the add/edit/delete methods, which address rows by their ID and
+    persist each call as one record.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._tables = {
+            'lessons': _Table(backend.table('lessons', LESSON_COLUMNS, LESSON_TYPED), LESSON_COLUMNS, LESSON_TYPED, _DateIndex),
+            'routines': _Table(backend.table('routines', ROUTINE_COLUMNS, ROUTINE_TYPED), ROUTINE_COLUMNS, ROUTINE_TYPED, _WeekdayIndex),
+        }
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._orders = {}  # list-view orderings, see entry_order()
+        self._busy = {}  # day number -> packed occupancy bits, see busy()
+        self._busy_key = None
+
+    def subscribe(self, callback):
+        """Call callback() (with no arguments) after every write made through this store."""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback()
+
+    @property
+    def lock(self):
+        """Re-entrant lock held around every read and write; hold it to see a consistent view
+        across several calls."""
+        return self._lock
+
+    def signature(self):
+        """Cheap on-disk fingerprint of both tables (stat calls only), for change polling."""
+        return tuple(table.current_signature() for table in self._tables.values())
+
+    def _table(self, name):
+        table = self._tables[name]
+        if table.df is not None and table.signature == table.current_signature():
+            self.hits += 1
+            count('cache_hits')
+        else:
+            self.misses += 1
+            count('cache_misses')
+            table.load()
+        return table
+
+    def _get(self, name):
+        with self._lock:
+            return self._table(name).frame()
+
+    def _indexed(self, name):
+        # The index is extended in place when added rows are materialized, so callers must
+        # hold the lock until they are done slicing with it
+        table = self._table(name)
+        return table.frame(), table.typed(), table.index()
+
+    def _write(self, name, record):
+        with self._lock:
+            table = self._table(name)
+            days = self._changed_days(name, table, record) if self._busy else set()
+            table.write(record)
+            if days is not None and record['op'] == 'edit' and self._busy:
+                moved = self._changed_days(name, table, record)  # where the edited rows are now
+                days = None if moved is None else days | moved
+            if days is None:
+                self._busy = {}
+            for day in days or ():
+                self._busy.pop(day, None)
+        self._notify()
+
+    def _changed_days(self, name, table, record):
+        """Day numbers whose occupancy a write can change, or None when it may change any day
+        (routines and repeating lessons)."""
+        if name != 'lessons':
+            return None
+        if record['op'] == 'add':
+            rows = record['rows'] if isinstance(record['rows'], pd.DataFrame) else pd.DataFrame(record['rows'])
+        else:
+            rows = table.frame().iloc[table.positions(record['ids'], missing_ok=True)]
+        if rows.empty:
+            return set()
+        if 'Repeat' in rows and rows['Repeat'].fillna('').astype(str).str.strip().ne('').any():
+            return None
+        days = _day_numbers(_parse_dates(rows['Date']))
+        return set(days[days >= 0].tolist())  # only routines run past midnight
+
+    def lessons(self):
+        return self._get('lessons')
+
+    def routines(self):
+        return self._get('routines')
+
+    def lessons_between(self, start_day=None, end_day=None, expand=True, limit=None):
+        """Lessons dated start_day..end_day (day numbers, inclusive, None for open) in date and
+        start-time order, plus their typed columns sliced to match; only the first limit rows
+        when limit is given.
+
+        Repeating lessons appear once per occurrence in the window, with Date and Day_of_Week
+        set to that occurrence and the index label of the lesson that defines the series. With
+        expand=False they appear once, as stored, if their first date is in the window.
+        """
+        with self._lock:
+            df, typed, index = self._indexed('lessons')
+            if not expand:
+                positions = index.order[index.slice_bounds(start_day, end_day)][:limit]
+                return df.iloc[positions], {name: values[positions] for name, values in typed.items()}
+            positions = index.slice(start_day, end_day)[:limit]
+            count('rows_scanned', len(positions))
+            if not len(index.rules):
+                return df.iloc[positions], {name: values[positions] for name, values in typed.items()}
+            repeated, repeated_days = index.occurrences(start_day, end_day)
 
-LESSONS_FILE = 'lessons_exams.csv'
-ROUTINES_FILE = 'daily_routines.csv'
+        count('rows_scanned', len(repeated))
+        one_off = len(positions)
+        days = np.concatenate([_day_numbers(typed['Date'][positions]), repeated_days])
+        positions = np.concatenate([positions, repeated])
+        order = np.argsort(days * 1440 + typed['Start'][positions], kind='stable')[:limit]
+        positions, days = positions[order], days[order]
+        lessons = df.iloc[positions]
+        sliced = {name: values[positions] for name, values in typed.items()}
+        occurrence = order >= one_off
+        if occurrence.any():
+            lessons = lessons.copy()
+            unique_days, day_positions = np.unique(days[occurrence], return_inverse=True)
+            stamps = pd.to_datetime(unique_days, unit='D')
+            date_column, weekday_column = lessons.columns.get_loc('Date'), lessons.columns.get_loc('Day_of_Week')
+            lessons.iloc[np.flatnonzero(occurrence), date_column] = stamps.strftime('%Y-%m-%d').to_numpy(dtype=object)[day_positions]
+            lessons.iloc[np.flatnonzero(occurrence), weekday_column] = stamps.day_name().to_numpy(dtype=object)[day_positions]
+            sliced['Date'] = days.astype('datetime64[D]')
+        return lessons, sliced
 
+    def busy(self, start_day, end_day):
+        """Occupancy of the days start_day..end_day (day numbers, inclusive): a uint8 array of
+        np.packbits rows, one per day, with a bit set for every minute some lesson, exam or
+        routine takes.
+
+        Days are computed once and cached; a write only drops the days it touches (every day
+        for routines and repeating lessons), and a reload or replace drops them all.
+        """
+        with self._lock:
+            key = tuple(self._table(name).generation for name in self._tables)
+            if key != self._busy_key:
+                self._busy, self._busy_key = {}, key
+            missing = [day for day in range(start_day, end_day + 1) if day not in self._busy]
+            count('busy_days_built', len(missing))
+            # Rebuild each run of consecutive missing days in one pass
+            for run in np.split(missing, np.flatnonzero(np.diff(missing) > 1) + 1) if missing else ():
+                rows = np.packbits(_busy_minutes(int(run[0]), int(run[-1]), self), axis=1)
+                for day, row in zip(run.tolist(), rows):
+                    self._busy[day] = row
+            if end_day < start_day:
+                return np.zeros((0, 1440 // 8), dtype=np.uint8)
+            return np.stack([self._busy[day] for day in range(start_day, end_day + 1)])
+
+    def lessons_by_date(self):
+        """All lessons sorted by date, with undated rows last."""
+        with self._lock:
+            df, _, index = self._indexed('lessons')
+            return df.iloc[np.concatenate([index.order, index.undated])]
+
+    def lesson_date_span(self):
+        """(first_day, last_day) over all dated lessons, or None when there are none."""
+        with self._lock:
+            _, _, index = self._indexed('lessons')
+            return index.span()
+
+    def routines_typed(self):
+        with self._lock:
+            df, typed, _ = self._indexed('routines')
+            return df, typed
+
+    def routines_on(self, weekday):
+        with self._lock:
+            df, typed, index = self._indexed('routines')
+            positions = index.on(weekday)
+        return df.iloc[positions].iloc[np.argsort(typed['Start'][positions], kind='stable')]
+
+    def entry_order(self, name, search='', sort_by='date', descending=False):
+        """(frame, positions): rows of the lessons/routines table whose Name, Location or Notes
+        contain search (case-insensitive), ordered by 'date' or 'name'. Cached until the table
+        changes, so paging through a list view is just a slice of positions."""
+        with self._lock:
+            table = self._table(name)
+            df, typed = table.frame(), table.typed()
+            key = (name, search.lower(), sort_by, descending)
+            cached = self._orders.get(key)
+            if cached is not None and cached[0] is df:
+                return df, cached[1]
+            count('rows_scanned', len(df))
+            if sort_by == 'name':
+                order = np.argsort(df['Name'].astype(str).str.lower().to_numpy(), kind='stable')
+            elif name == 'lessons':
+                index = table.index()
+                order = np.concatenate([index.order, index.undated])
+            else:
+                weekday = df['Day_of_Week'].map({day: i for i, day in enumerate(WEEKDAYS)}).fillna(-1).to_numpy()
+                order = np.lexsort((typed['Start'], weekday))
+            if descending:
+                order = order[::-1]
+            if search:
+                matches = np.zeros(len(df), dtype=bool)
+                for column in ('Name', 'Location', 'Notes'):
+                    if column in df:
+                        matches |= df[column].fillna('').astype(str).str.contains(search, case=False, regex=False).to_numpy()
+                order = order[matches[order]]
+            self._orders = {k: v for k, v in self._orders.items() if v[0] is df}
+            self._orders[key] = (df, order)
+            return df, order
+
+    def entries(self, name, ids):
+        """Rows of the lessons/routines table with the given IDs, in that order; IDs that no
+        longer exist are left out."""
+        with self._lock:
+            table = self._table(name)
+            return table.frame().iloc[table.positions(ids, missing_ok=True)]
+
+    def _add(self, name, rows):
+        # IDs are always assigned here, so imported rows can never collide with existing ones
+        ids = _new_ids(len(rows))
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.assign(ID=ids)
+        else:
+            rows = [dict(row, ID=entry_id) for row, entry_id in zip(rows, ids)]
+        self._write(name, {'op': 'add', 'rows': rows})
+        return ids
+
+    def add_lessons(self, rows):
+        """Append rows (a list of dicts or a DataFrame with LESSON_COLUMNS) in one write and
+        return the IDs given to them."""
+        return self._add('lessons', rows)
+
+    def add_routines(self, rows):
+        return self._add('routines', rows)
+
+    def import_rows(self, name, rows):
+        """Append a DataFrame of validated rows to the lessons/routines table straight in
+        storage, without journaling them or keeping them in memory, and return their IDs.
+
+        For bulk imports: the in-memory table is dropped and read again on next use, so an
+        import of any size only holds one batch at a time.
+        """
+        ids = _new_ids(len(rows))
+        rows = rows.assign(ID=ids)
+        with self._lock:
+            table = self._tables[name]
+            if not table.storage.append_rows(rows):
+                self._table(name).compact()  # fold the journal into the CSV first
+                if not table.storage.append_rows(rows):
+                    raise RuntimeError(f"Cannot append to the {name} table.")
+            table.unload()
+            self._orders = {}  # cached list orderings hold on to the old frame
+        self._notify()
+        return ids
+
+    def update_many(self, name, changes):
+        """Apply {ID: {column: value}} to the lessons/routines table as one write."""
+        if any('ID' in updates for updates in changes.values()):
+            raise ValueError("An entry's ID cannot be changed.")
+        self._write(name, {'op': 'edit', 'ids': list(changes), 'updates': list(changes.values())})
+
+    def delete_many(self, name, ids):
+        """Delete the rows with the given IDs from the lessons/routines table as one write."""
+        self._write(name, {'op': 'delete', 'ids': list(dict.fromkeys(ids))})
+
+    def edit_lesson(self, entry_id, updates):
+        self.update_many('lessons', {entry_id: updates})
+
+    def edit_routine(self, entry_id, updates):
+        self.update_many('routines', {entry_id: updates})
+
+    def delete_lesson(self, entry_id):
+        self.delete_many('lessons', [entry_id])
+
+    def delete_routine(self, entry_id):
+        self.delete_many('routines', [entry_id])
+
+    def save_lessons(self, df):
+        with self._lock:
+            self._tables['lessons'].replace(df)
+        self._notify()
+
+    def save_routines(self, df):
+        with self._lock:
+            self._tables['routines'].replace(df)
+        self._notify()
+
+    def initialize(self):
+        with self._lock:
+            for table in self._tables.values():
+                table.storage.initialize()
+
+    def compact(self):
+        """Fold any journaled changes back into the base CSV files (a no-op for SQLite)."""
+        with self._lock:
+            for name in self._tables:
+                table = self._table(name)
+                if table.storage.has_changes():
+                    table.compact()
+
+    def invalidate(self):
+        with self._lock:
+            for table in self._tables.values():
+                table.unload()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def open_backend(name=None):
+    name = name or STORAGE_BACKEND
+    if name == 'csv':
+        return CsvBackend(LESSONS_FILE, ROUTINES_FILE)
+    if name == 'sqlite':
+        return SqliteBackend(DATABASE_FILE)
+    raise ValueError(f"Unknown storage backend '{name}', expected 'csv' or 'sqlite'.")
+
+# Shared by the GUI and the reminder thread
+store = TimetableStore(open_backend())
+
+@timed()
 def initialize_files():
-    if not os.path.exists(LESSONS_FILE):
-        pd.DataFrame(columns=['Type', 'Name', 'Date', 'Start_Time', 'End_Time', 'Day_of_Week', 'Location', 'Notes']).to_csv(LESSONS_FILE, index=False)
-    if not os.path.exists(ROUTINES_FILE):
-        pd.DataFrame(columns=['Name', 'Start_Time', 'End_Time', 'Day_of_Week', 'Notes']).to_csv(ROUTINES_FILE, index=False)
+    store.initialize()
 
+@timed()
+def migrate_csv_to_sqlite(db_path=DATABASE_FILE):
+    """Copy LESSONS_FILE/ROUTINES_FILE (including any unfolded journal) into an SQLite database,
+    replacing whatever it held. Returns the (lessons, routines) row counts copied."""
+    source = TimetableStore(CsvBackend(LESSONS_FILE, ROUTINES_FILE))
+    target = TimetableStore(SqliteBackend(db_path))
+    lessons, routines = source.lessons(), source.routines()
+    target.save_lessons(lessons)
+    target.save_routines(routines)
+    return len(lessons), len(routines)
+
+@timed()
 def load_lessons():
-    try:
-        return pd.read_csv(LESSONS_FILE)
-    except pd.errors.EmptyDataError:
-        return pd.DataFrame(columns=['Type', 'Name', 'Date', 'Start_Time', 'End_Time', 'Day_of_Week', 'Location', 'Notes'])
+    return store.lessons().copy()
 
+@timed()
 def load_routines():
-    try:
-        return pd.read_csv(ROUTINES_FILE)
-    except pd.errors.EmptyDataError:
-        return pd.DataFrame(columns=['Name', 'Start_Time', 'End_Time', 'Day_of_Week', 'Notes'])
+    return store.routines().copy()
 
+@timed()
 def save_lessons(df):
-    df.to_csv(LESSONS_FILE, index=False)
+    store.save_lessons(df)
 
+@timed()
 def save_routines(df):
-    df.to_csv(ROUTINES_FILE, index=False)
+    store.save_routines(df)
+
+LESSON_TYPES = ['Lesson', 'Exam']
+
+# HH:MM text for every minute of the day, plus '' at position -1 for invalid times
+_TIME_TEXT = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)] + [''], dtype=object)
 
-def add_lesson_exam(entry_type, name, date, start_time, end_time, location, notes):
+def _text_column(df, column):
+    if column not in df:
+        return pd.Series('', index=df.index, dtype=object)
+    return df[column].fillna('').astype(str).str.strip()
+
+def _first_errors(checks, length):
+    """Per-row message of the first failing check (None where all pass) from (failed_mask, message) pairs."""
+    messages = np.full(length, None, dtype=object)
+    for failed, message in reversed(checks):
+        messages = np.where(failed, message, messages)
+    return messages
+
+def _split_valid(rows, checks):
+    messages = _first_errors(checks, len(rows))
+    bad = np.flatnonzero(messages != None)  # noqa: E711 - elementwise comparison
+    errors = [(int(position), messages[position]) for position in bad]
+    return rows[messages == None].reset_index(drop=True), errors  # noqa: E711
+
+@timed()
+def validate_lessons(df):
+    """Check and normalize lesson/exam rows with the rules used by add_lesson_exam.
+
+    Returns (rows, errors): rows are the valid ones with LESSON_COLUMNS, ISO dates, HH:MM times
+    and Day_of_Week derived from Date; errors lists (position in df, message) for the rest.
+    """
+    types = _text_column(df, 'Type').str.capitalize()
+    names = _text_column(df, 'Name')
+    dates = _parse_dates(_text_column(df, 'Date'))
+    starts = _parse_times(_text_column(df, 'Start_Time'))
+    ends = _parse_times(_text_column(df, 'End_Time'))
+    valid_dates = np.where(np.isnat(dates), np.datetime64('1970-01-01', 'D'), dates)
+    repeat_codes, repeat_values = pd.factorize(_text_column(df, 'Repeat'))
+    repeats = []
+    for value in repeat_values:
+        try:
+            repeats.append(_normalize_repeat(value))
+        except ValueError:
+            repeats.append(None)
+    repeats = np.array(repeats + [''], dtype=object)[repeat_codes]
+    rows = pd.DataFrame({
+        'Type': types.to_numpy(),
+        'Name': names.to_numpy(),
+        'Date': np.datetime_as_string(valid_dates, unit='D'),
+        'Start_Time': _TIME_TEXT[starts],
+        'End_Time': _TIME_TEXT[ends],
+        'Day_of_Week': np.array(WEEKDAYS, dtype=object)[weekday(valid_dates.astype(np.int64))],
+        'Location': _text_column(df, 'Location').to_numpy(),
+        'Notes': _text_column(df, 'Notes').to_numpy(),
+        'Repeat': repeats,
+    }, columns=LESSON_COLUMNS)
+    return _split_valid(rows, [
+        (~types.isin(LESSON_TYPES).to_numpy(), "Type must be Lesson or Exam."),
+        ((names == '').to_numpy(), "Name is required."),
+        (np.isnat(dates), "Invalid date, expected YYYY-MM-DD."),
+        (starts < 0, "Invalid start time, expected HH:MM (24-hour)."),
+        (ends < 0, "Invalid end time, expected HH:MM (24-hour)."),
+        (ends <= starts, "End time must be after the start time."),
+        (repeats == None, "Invalid repeat rule, expected e.g. FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=2026-05-01."),  # noqa: E711
+    ])
+
+@timed()
+def validate_routines(df):
+    """Check and normalize routine rows with the rules used by add_routine; see validate_lessons."""
+    names = _text_column(df, 'Name')
+    days = _text_column(df, 'Day_of_Week').str.capitalize()
+    starts = _parse_times(_text_column(df, 'Start_Time'))
+    ends = _parse_times(_text_column(df, 'End_Time'))
+    rows = pd.DataFrame({
+        'Name': names.to_numpy(),
+        'Start_Time': _TIME_TEXT[starts],
+        'End_Time': _TIME_TEXT[ends],
+        'Day_of_Week': days.to_numpy(),
+        'Notes': _text_column(df, 'Notes').to_numpy(),
+    }, columns=ROUTINE_COLUMNS)
+    return _split_valid(rows, [
+        ((names == '').to_numpy(), "Name is required."),
+        (~days.isin(WEEKDAYS + ['Everyday']).to_numpy(), "Invalid day of week, expected e.g. Monday or Everyday."),
+        (starts < 0, "Invalid start time, expected HH:MM (24-hour)."),
+        (ends < 0, "Invalid end time, expected HH:MM (24-hour)."),
+    ])
+
+# Single-entry adds apply the same rules as validate_lessons/validate_routines row by row,
+# without the per-call overhead of building a one-row DataFrame
+
+@timed()
+def add_lesson_exam(entry_type, name, date, start_time, end_time, location, notes, repeat=''):
+    """Add one lesson/exam; repeat is an optional recurrence rule (see recurrence.py) that
+    makes date the first of a series."""
+    entry_type = str(entry_type).strip().capitalize()
+    if entry_type not in LESSON_TYPES:
+        raise ValueError("Type must be Lesson or Exam.")
+    if not str(name).strip():
+        raise ValueError("Name is required.")
+    date = _normalize_date(date)
     day_of_week = datetime.strptime(date, '%Y-%m-%d').strftime('%A')
-    df = load_lessons()
-    new_entry = pd.DataFrame({
-        'Type': [entry_type.capitalize()],
-        'Name': [name],
-        'Date': [date],
-        'Start_Time': [start_time],
-        'End_Time': [end_time],
-        'Day_of_Week': [day_of_week],
-        'Location': [location],
-        'Notes': [notes]
-    })
-    df = pd.concat([df, new_entry], ignore_index=True)
-    save_lessons(df)
+    start_time, end_time = _normalize_time(start_time), _normalize_time(end_time)
+    _check_lesson_times(start_time, end_time)
+    return store.add_lessons([{
+        'Type': entry_type,
+        'Name': str(name).strip(),
+        'Date': date,
+        'Start_Time': start_time,
+        'End_Time': end_time,
+        'Day_of_Week': day_of_week,
+        'Location': location,
+        'Notes': notes,
+        'Repeat': _normalize_repeat(repeat),
+    }])[0]
 
+@timed()
 def add_routine(name, start_time, end_time, day_of_week, notes):
-    df = load_routines()
-    new_entry = pd.DataFrame({
-        'Name': [name],
-        'Start_Time': [start_time],
-        'End_Time': [end_time],
-        'Day_of_Week': [day_of_week],
-        'Notes': [notes]
-    })
-    df = pd.concat([df, new_entry], ignore_index=True)
-    save_routines(df)
-
-def edit_lesson_exam(index, updates):
-    df = load_lessons()
-    for key, value in updates.items():
-        df.at[index, key] = value
+    if not str(name).strip():
+        raise ValueError("Name is required.")
+    return store.add_routines([{
+        'Name': str(name).strip(),
+        'Start_Time': _normalize_time(start_time),
+        'End_Time': _normalize_time(end_time),
+        'Day_of_Week': _normalize_weekday(day_of_week),
+        'Notes': notes
+    }])[0]
+
+def _check_lesson_times(start_time, end_time):
+    # Unlike routines, a lesson or exam cannot run past midnight
+    if parse_minutes(end_time) <= parse_minutes(start_time):
+        raise ValueError("End time must be after the start time.")
+
+def _normalize_updates(updates):
+    updates = dict(updates)
+    for key in ('Start_Time', 'End_Time'):
+        if key in updates:
+            updates[key] = _normalize_time(updates[key])
+    return updates
+
+def _normalize_lesson_updates(updates):
+    updates = _normalize_updates(updates)
     if 'Date' in updates:
-        df.at[index, 'Day_of_Week'] = datetime.strptime(updates['Date'], '%Y-%m-%d').strftime('%A')
-    save_lessons(df)
+        updates['Date'] = _normalize_date(updates['Date'])
+        updates['Day_of_Week'] = datetime.strptime(updates['Date'], '%Y-%m-%d').strftime('%A')
+    if 'Repeat' in updates:
+        updates['Repeat'] = _normalize_repeat(updates['Repeat'])
+    return updates
+
+def _check_lesson_updates(changes):
+    """Raise unless every lesson edited by {ID: normalized updates} still ends after it starts."""
+    timed = {entry_id: updates for entry_id, updates in changes.items()
+             if 'Start_Time' in updates or 'End_Time' in updates}
+    if not timed:
+        return
+    current = store.entries('lessons', list(timed)).set_index('ID')
+    for entry_id, updates in timed.items():
+        if entry_id not in current.index:
+            continue  # the write itself reports the unknown ID
+        start = updates.get('Start_Time', current.at[entry_id, 'Start_Time'])
+        end = updates.get('End_Time', current.at[entry_id, 'End_Time'])
+        if parse_minutes(start) is not None and parse_minutes(end) is not None:
+            _check_lesson_times(start, end)
 
-def edit_routine(index, updates):
-    df = load_routines()
-    for key, value in updates.items():
-        df.at[index, key] = value
-    save_routines(df)
+def _normalize_routine_updates(updates):
+    updates = _normalize_updates(updates)
+    if 'Day_of_Week' in updates:
+        updates['Day_of_Week'] = _normalize_weekday(updates['Day_of_Week'])
+    return updates
 
-def delete_lesson_exam(index):
-    df = load_lessons()
-    df = df.drop(index).reset_index(drop=True)
-    save_lessons(df)
+def _table_name(entry_type):
+    return 'lessons' if entry_type.lower() == 'lesson/exam' else 'routines'
 
-def delete_routine(index):
-    df = load_routines()
-    df = df.drop(index).reset_index(drop=True)
-    save_routines(df)
+@timed()
+def edit_lesson_exam(entry_id, updates):
+    updates = _normalize_lesson_updates(updates)
+    _check_lesson_updates({entry_id: updates})
+    store.edit_lesson(entry_id, updates)
 
+@timed()
+def edit_routine(entry_id, updates):
+    store.edit_routine(entry_id, _normalize_routine_updates(updates))
+
+@timed()
+def delete_lesson_exam(entry_id):
+    store.delete_lesson(entry_id)
+
+@timed()
+def delete_routine(entry_id):
+    store.delete_routine(entry_id)
+
+@timed()
+def update_many(entry_type, changes):
+    """Apply {ID: updates} to lessons/exams ('lesson/exam') or routines ('routine') in one write.
+
+    Each updates dict is checked like edit_lesson_exam/edit_routine; nothing is written if
+    any of them is invalid or names an unknown ID.
+    """
+    name = _table_name(entry_type)
+    normalize = _normalize_lesson_updates if name == 'lessons' else _normalize_routine_updates
+    changes = {entry_id: normalize(updates) for entry_id, updates in changes.items()}
+    if name == 'lessons':
+        _check_lesson_updates(changes)
+    store.update_many(name, changes)
+
+@timed()
+def delete_many(entry_type, ids):
+    """Delete the entries with the given IDs in one write; see update_many."""
+    store.delete_many(_table_name(entry_type), ids)
+
+@timed()
+def get_entries(entry_type, ids):
+    """The entries with the given IDs (those still present), e.g. to refresh rows of a list view."""
+    return store.entries(_table_name(entry_type), ids)
+
+ENTRY_PAGE_SIZE = 100
+
+@timed()
+def query_entries(entry_type, search='', sort_by='date', descending=False, offset=0, limit=ENTRY_PAGE_SIZE):
+    """One page of entries for the Edit/Delete lists. entry_type is 'lesson/exam' or 'routine'.
+
+    Returns (page, total) where page includes the ID column used by edit_*/delete_* and total
+    is the number of entries matching search.
+    """
+    df, order = store.entry_order(_table_name(entry_type), search.strip(), sort_by, descending)
+    return df.iloc[order[offset:offset + limit]], len(order)
+
+@timed()
 def get_daily_schedule(date):
-    day_of_week = datetime.strptime(date, '%Y-%m-%d').strftime('%A')
-    lessons_df = load_lessons()
-    routines_df = load_routines()
-    daily_lessons = lessons_df[lessons_df['Date'] == date]
-    daily_routines = routines_df[(routines_df['Day_of_Week'] == day_of_week) | (routines_df['Day_of_Week'] == 'Everyday')]
+    day = day_number(date)
+    daily_lessons, _ = store.lessons_between(day, day)
+    daily_routines = store.routines_on(WEEKDAYS[datetime.strptime(date, '%Y-%m-%d').weekday()])
     return daily_lessons, daily_routines
 
+@timed()
+def get_range_schedule(start_date=None, end_date=None):
+    """Lessons/exams dated start_date..end_date (inclusive; None leaves that end open) in date
+    order, and the routines that fall on at least one day of the range."""
+    start_day = None if start_date is None else day_number(start_date)
+    end_day = None if end_date is None else day_number(end_date)
+    lessons, _ = store.lessons_between(start_day, end_day)
+    routines = store.routines()
+    if start_day is not None and end_day is not None and end_day - start_day < 6:
+        weekdays = {WEEKDAYS[weekday(day)] for day in range(start_day, end_day + 1)}
+        routines = routines[routines['Day_of_Week'].isin(weekdays | {'Everyday'})]
+    return lessons, routines
+
+@timed()
 def get_weekly_schedule(start_date):
     start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+    start_day = day_number(start_date)
+    lessons, typed = store.lessons_between(start_day, start_day + 6)
+    days = _day_numbers(typed['Date'])
     weekly_data = {}
     for i in range(7):
-        day = (start_dt + timedelta(days=i)).strftime('%Y-%m-%d')
-        weekly_data[day] = get_daily_schedule(day)
+        dt = start_dt + timedelta(days=i)
+        lo, hi = np.searchsorted(days, [start_day + i, start_day + i + 1])
+        weekly_data[dt.strftime('%Y-%m-%d')] = lessons.iloc[lo:hi], store.routines_on(WEEKDAYS[dt.weekday()])
     return weekly_data
 
+@timed()
 def get_semester_schedule():
-    return load_lessons().sort_values('Date'), load_routines()
+    return store.lessons_by_date(), store.routines().copy()
 
+@timed()
 def get_upcoming_events():
     today = datetime.now().strftime('%Y-%m-%d')
-    lessons_df = load_lessons()
-    upcoming = lessons_df[lessons_df['Date'] >= today].sort_values('Date').head(5)
+    upcoming, _ = store.lessons_between(day_number(today), limit=5)
     return upcoming
 
+CONFLICT_COLUMNS = ['Date', 'First', 'First_Type', 'First_Start', 'First_End',
+                    'Second', 'Second_Type', 'Second_Start', 'Second_End']
+
+def _timed_events(start_day, end_day, timetable=None):
+    """Every lesson/exam and expanded routine occurrence between the two day numbers, as
+    parallel arrays of absolute start/end minutes and display columns.
+
+    A routine that ends before it starts runs past midnight; a lesson stored that way (which
+    the add/edit checks no longer let through) counts as zero length, as does any entry whose
+    end equals its start.
+    """
+    timetable = timetable or store
+    lessons, lesson_typed = timetable.lessons_between(start_day, end_day)
+    routines, routine_typed = timetable.routines_typed()
+
+    # Routine occurrences: every day in the range whose weekday matches (or Everyday)
+    days = np.arange(start_day, end_day + 1)
+    day_weekdays = weekday(days)
+    routine_weekdays = routines['Day_of_Week'].map({day: i for i, day in enumerate(WEEKDAYS)})
+    everyday = (routines['Day_of_Week'] == 'Everyday').to_numpy()
+    matches = (routine_weekdays.to_numpy()[:, None] == day_weekdays[None, :]) | everyday[:, None]
+    routine_rows, day_positions = np.nonzero(matches)
+
+    sources = [
+        (lessons['Type'].to_numpy(dtype=object), lessons, _day_numbers(lesson_typed['Date']),
+         lesson_typed['Start'], lesson_typed['End'], False),
+        (np.full(len(routine_rows), 'Routine', dtype=object), routines.iloc[routine_rows], days[day_positions],
+         routine_typed['Start'][routine_rows], routine_typed['End'][routine_rows], True),
+    ]
+    kinds, names, starts_text, ends_text, event_days_out, starts, ends = [], [], [], [], [], [], []
+    for kind, df, event_days, start, end, overnight in sources:
+        start, end = start.astype(np.int64), end.astype(np.int64)
+        valid = (start >= 0) & (end >= 0)
+        end = np.where(end < start, end + 1440 if overnight else start, end)
+        kinds.append(kind[valid])
+        names.append(df['Name'].to_numpy(dtype=object)[valid])
+        starts_text.append(df['Start_Time'].to_numpy(dtype=object)[valid])
+        ends_text.append(df['End_Time'].to_numpy(dtype=object)[valid])
+        event_days = np.asarray(event_days, dtype=np.int64)[valid]
+        event_days_out.append(event_days)
+        base = event_days * 1440
+        starts.append(base + start[valid])
+        ends.append(base + end[valid])
+    return {
+        'kind': np.concatenate(kinds), 'name': np.concatenate(names),
+        'start_text': np.concatenate(starts_text), 'end_text': np.concatenate(ends_text),
+        'day': np.concatenate(event_days_out),
+        'start': np.concatenate(starts), 'end': np.concatenate(ends),
+    }
+
+@timed()
+def get_timed_events(start_date, end_date, timetable=None):
+    """Lessons, exams and routine occurrences between the two dates (inclusive) with valid times,
+    one row per occurrence. Start/End are minutes since 1970-01-01 00:00 local time.
+
+    timetable is the TimetableStore to read (the shared store by default).
+    """
+    events = _timed_events(day_number(start_date), day_number(end_date), timetable)
+    unique_days, day_positions = np.unique(events['day'], return_inverse=True)
+    dates = pd.to_datetime(unique_days, unit='D').strftime('%Y-%m-%d').to_numpy(dtype=object)[day_positions]
+    return pd.DataFrame({
+        'Type': events['kind'], 'Name': events['name'], 'Date': dates,
+        'Start_Time': events['start_text'], 'End_Time': events['end_text'],
+        'Start': events['start'], 'End': events['end'],
+    }).sort_values('Start', kind='stable')
+
+@timed()
+def find_conflicts(start_date=None, end_date=None, timetable=None):
+    """Every pair of overlapping events (lessons, exams and routine occurrences) between
+    start_date and end_date inclusive, as a DataFrame with CONFLICT_COLUMNS.
+
+    Leaving either date as None extends the scan to the first/last dated lesson. Events are
+    sorted once by start; each event then overlaps exactly the later-starting events that
+    begin before it ends, which a searchsorted finds for all events at once. timetable is the
+    TimetableStore to scan (the shared store by default).
+    """
+    timetable = timetable or store
+    span = timetable.lesson_date_span()
+    start_day = day_number(start_date) if start_date else (span[0] if span else None)
+    end_day = day_number(end_date) if end_date else (span[1] if span else None)
+    if start_day is None or end_day is None or end_day < start_day:
+        return pd.DataFrame(columns=CONFLICT_COLUMNS)
+
+    events = _timed_events(start_day, end_day, timetable)
+    timed = np.flatnonzero(events['end'] > events['start'])  # a zero-length event overlaps nothing
+    order = timed[np.argsort(events['start'][timed], kind='stable')]
+    starts, ends = events['start'][order], events['end'][order]
+    stop = np.searchsorted(starts, ends, side='left')
+    counts = np.maximum(stop - np.arange(len(starts)) - 1, 0)
+    first = np.repeat(np.arange(len(starts)), counts)
+    group_starts = np.repeat(np.cumsum(counts) - counts, counts)
+    second = first + 1 + (np.arange(len(first)) - group_starts)
+    first, second = order[first], order[second]
+
+    overlap_days = np.maximum(events['start'][first], events['start'][second]) // 1440
+    unique_days, day_positions = np.unique(overlap_days, return_inverse=True)
+    dates = pd.to_datetime(unique_days, unit='D').strftime('%Y-%m-%d').to_numpy(dtype=object)[day_positions]
+    return pd.DataFrame({
+        'Date': dates,
+        'First': events['name'][first], 'First_Type': events['kind'][first],
+        'First_Start': events['start_text'][first], 'First_End': events['end_text'][first],
+        'Second': events['name'][second], 'Second_Type': events['kind'][second],
+        'Second_Start': events['start_text'][second], 'Second_End': events['end_text'][second],
+    }, columns=CONFLICT_COLUMNS)
+
+@timed()
 def check_conflicts(date):
-    lessons_df = load_lessons()
-    daily = lessons_df[lessons_df['Date'] == date].copy()
-    if daily.empty:
-        return []
-    daily['Start'] = pd.to_datetime(daily['Date'] + ' ' + daily['Start_Time'])
-    daily['End'] = pd.to_datetime(daily['Date'] + ' ' + daily['End_Time'])
-    daily = daily.sort_values('Start')
-    conflicts = []
-    for i in range(1, len(daily)):
-        if daily.iloc[i]['Start'] < daily.iloc[i-1]['End']:
-            conflicts.append(f"Conflict between {daily.iloc[i-1]['Name']} and {daily.iloc[i]['Name']}")
-    return conflicts
\ No newline at end of file
+    conflicts = find_conflicts(date, date)
+    return [f"Conflict between {first} and {second}" for first, second in zip(conflicts['First'], conflicts['Second'])]
+
+SLOT_COLUMNS = ['Date', 'Day_of_Week', 'Start_Time', 'End_Time', 'Minutes']
+
+# Hours searched for free time unless the constraints say otherwise
+FREE_SLOT_HOURS = ('08:00', '22:00')
+
+# Days searched when find_free_slots() is given no end date
+FREE_SLOT_DAYS = 7
+
+def _busy_minutes(start_day, end_day, timetable):
+    """Boolean (days, 1440) array: True for every minute between the two day numbers
+    (inclusive) taken by a lesson, exam or routine occurrence."""
+    # Start a day early to catch events that run past midnight into the first day
+    events = _timed_events(start_day - 1, end_day, timetable)
+    size = (end_day - start_day + 1) * 1440
+    starts = np.clip(events['start'] - start_day * 1440, 0, size)
+    ends = np.clip(events['end'] - start_day * 1440, 0, size)
+    keep = ends > starts
+    # +1 where an event starts, -1 where it ends; a minute is busy while the running sum is positive
+    edges = np.bincount(starts[keep], minlength=size + 1) - np.bincount(ends[keep], minlength=size + 1)
+    return (np.cumsum(edges[:size]) > 0).reshape(-1, 1440)
+
+
+def _slot_range(start_date, end_date):
+    start_day = day_number(start_date)
+    end_day = day_number(end_date) if end_date else start_day + FREE_SLOT_DAYS - 1
+    if end_day < start_day:
+        raise ValueError("The end date must not be before the start date.")
+    return start_day, end_day
+
+
+def _slot_minutes(value, name):
+    """Minutes since midnight for an HH:MM bound; 24:00 is allowed as the end of the day."""
+    if str(value).strip() == '24:00':
+        return 1440
+    minutes = parse_minutes(value)
+    if minutes is None:
+        raise ValueError(f"Invalid {name} time '{value}', expected HH:MM (24-hour).")
+    return minutes
+
+
+def _duration_minutes(value):
+    """Minutes for a duration given as a number of minutes or as H:MM."""
+    text = str(value).strip()
+    duration = int(text) if text.isdigit() else 1440 if text == '24:00' else parse_minutes(text)
+    if duration is None:
+        raise ValueError(f"Invalid duration '{value}', expected minutes or H:MM.")
+    if not 0 < duration <= 1440:
+        raise ValueError("The duration must be between 1 minute and 24 hours.")
+    return duration
+
+
+def _slot_constraints(constraints):
+    constraints = dict(constraints or {})
+    unknown = set(constraints) - {'earliest', 'latest', 'weekdays', 'buffer'}
+    if unknown:
+        raise ValueError(f"Unknown constraint(s): {', '.join(sorted(unknown))}.")
+    earliest = _slot_minutes(constraints.get('earliest') or FREE_SLOT_HOURS[0], 'earliest')
+    latest = _slot_minutes(constraints.get('latest') or FREE_SLOT_HOURS[1], 'latest')
+    if latest <= earliest:
+        raise ValueError("The latest time must be after the earliest time.")
+    weekdays = constraints.get('weekdays') or WEEKDAYS
+    if isinstance(weekdays, str):
+        weekdays = weekdays.replace(',', ' ').split()
+    names = {day.lower(): i for i, day in enumerate(WEEKDAYS)}
+    names.update({day[:3].lower(): i for i, day in enumerate(WEEKDAYS)})
+    unknown = [day for day in weekdays if str(day).strip().lower() not in names]
+    if unknown:
+        raise ValueError(f"Unknown weekday(s): {', '.join(map(str, unknown))}.")
+    buffer = str(constraints.get('buffer') or 0).strip()
+    if not buffer.isdigit():
+        raise ValueError(f"Invalid buffer '{buffer}', expected whole minutes.")
+    return earliest, latest, {names[str(day).strip().lower()] for day in weekdays}, int(buffer)
+
+
+def free_slots_in(busy, start_date, duration=60, constraints=None):
+    """Free slots of at least duration minutes in busy, packed occupancy rows for consecutive
+    days starting at start_date (see busy_between()), as a DataFrame with SLOT_COLUMNS.
+
+    Each slot is a maximal free stretch within one day, clipped to the allowed hours.
+    constraints is an optional dict with 'earliest'/'latest' (HH:MM, default FREE_SLOT_HOURS),
+    'weekdays' (names or three-letter abbreviations, default every day) and 'buffer' (minutes
+    to keep free before and after every event).
+    """
+    duration = _duration_minutes(duration)
+    earliest, latest, weekdays, buffer = _slot_constraints(constraints)
+    start_day = day_number(start_date)
+    busy = np.unpackbits(busy, axis=1, count=1440).astype(bool)
+    if buffer:
+        # Widen every busy stretch by buffer minutes on both sides: a minute stays free only if
+        # the window around it holds no busy minute
+        flat = np.concatenate([[0], np.cumsum(busy.ravel(), dtype=np.int64)])
+        positions = np.arange(busy.size)
+        window = flat[np.minimum(positions + buffer + 1, busy.size)] - flat[np.maximum(positions - buffer, 0)]
+        busy = (window > 0).reshape(busy.shape)
+    days = np.arange(start_day, start_day + len(busy))
+    free = ~busy
+    free[:, :earliest] = False
+    free[:, latest:] = False
+    free[~np.isin(weekday(days), list(weekdays))] = False
+
+    # Pad every day with a busy minute on each side, so each free run has one rising and one
+    # falling edge in the same row
+    padded = np.zeros((len(free), 1442), dtype=np.int8)
+    padded[:, 1:-1] = free
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    keep = ends - starts >= duration
+    rows, starts, ends = rows[keep], starts[keep], ends[keep]
+    count('rows_scanned', len(free) * 1440)
+
+    dates = pd.to_datetime(days[rows], unit='D')
+    return pd.DataFrame({
+        'Date': dates.strftime('%Y-%m-%d').to_numpy(dtype=object),
+        'Day_of_Week': np.array(WEEKDAYS, dtype=object)[weekday(days[rows])],
+        'Start_Time': _TIME_TEXT[starts],
+        'End_Time': np.where(ends == 1440, '24:00', _TIME_TEXT[ends % 1440]),
+        'Minutes': ends - starts,
+    }, columns=SLOT_COLUMNS)
+
+def busy_between(start_date, end_date=None, timetable=None):
+    """Packed minute occupancy of start_date..end_date (FREE_SLOT_DAYS days when end_date is
+    None): a uint8 array with one np.packbits row of 1440 bits per day."""
+    timetable = timetable or store
+    return timetable.busy(*_slot_range(start_date, end_date))
+
+@timed()
+def find_free_slots(start_date, end_date=None, duration=60, constraints=None, timetable=None):
+    """Free slots of at least duration minutes (a number or H:MM) between start_date and
+    end_date inclusive, as a DataFrame with SLOT_COLUMNS; see free_slots_in() for constraints.
+
+    Occupancy is kept per day as a 1440-bit set in the store, so repeated queries over the
+    same weeks only redo the days a write has touched since.
+    """
+    duration = _duration_minutes(duration)
+    _slot_constraints(constraints)  # reject bad constraints before building anything
+    return free_slots_in(busy_between(start_date, end_date, timetable), start_date, duration, constraints)
@@ -1,10 +1,243 @@
 # timetable_app/gui.py
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import threading
+import instrumentation
 from data_manager import *
+from instrumentation import timed
+from import_export import export_ics, import_csv, import_ics
 from reminders import check_reminders
+from workers import BackgroundRunner
+
+
+# Lines inserted into a schedule view per after() tick
+RENDER_CHUNK_LINES = 300
+
+
+def _column_widths(df):
+    """Display width of the index and of every column of df, so rows can be formatted one at a time."""
+    widths = [int(df.index.astype(str).str.len().max()) if len(df) else 0]
+    for column in df.columns:
+        values = df[column].fillna('').astype(str)
+        widths.append(max(len(column), int(values.str.len().max()) if len(values) else 0))
+    return widths
+
+
+class ScheduleView(ttk.Frame):
+    """Read-only schedule text that is formatted and inserted a chunk of lines per after() tick.
+
+    show() takes sections of (title, parts) where each part is (subtitle or None, DataFrame,
+    column widths). Rows are formatted only as they are inserted, so the first screen appears
+    at once and no full-size string is ever built. Clicking a section title collapses or
+    expands it; cancel() (or a new show()) stops a render that is still running.
+    """
+
+    def __init__(self, parent, chunk_lines=RENDER_CHUNK_LINES):
+        super().__init__(parent)
+        self.chunk_lines = chunk_lines
+        self.text = tk.Text(self, height=20, width=80, wrap='none')
+        scroll = ttk.Scrollbar(self, command=self.text.yview)
+        self.text.configure(yscrollcommand=scroll.set)
+        self.text.grid(row=0, column=0, sticky='nsew')
+        scroll.grid(row=0, column=1, sticky='ns')
+        self.text.tag_configure('title', font=('TkDefaultFont', 10, 'bold'))
+        self._lines = None
+        self._job = None
+        self._collapsed = {}
+
+    def cancel(self):
+        if self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
+        self._lines = None
+
+    def clear(self):
+        self.cancel()
+        self.text.delete('1.0', tk.END)
+        for tag in self._collapsed:
+            self.text.tag_delete(tag, f'{tag}.title')
+        self._collapsed = {}
+
+    def show(self, sections):
+        self.clear()
+        self._lines = self._format(sections)
+        self._insert_chunk()
+
+    def show_message(self, message):
+        self.clear()
+        self.text.insert(tk.END, message)
+
+    def _format(self, sections):
+        """(text, tags) per line; runs lazily, a chunk at a time, on the Tk thread."""
+        for number, (title, parts) in enumerate(sections):
+            tag = f'section{number}'
+            self._collapsed[tag] = False
+            self.text.tag_bind(f'{tag}.title', '<Button-1>', lambda event, tag=tag: self.toggle(tag))
+            yield f"\u25be {title}\n", ('title', f'{tag}.title')
+            for subtitle, df, widths in parts:
+                if subtitle:
+                    yield f"  {subtitle}:\n", (tag,)
+                if df.empty:
+                    yield "    None\n", (tag,)
+                    continue
+                header = "".ljust(widths[0]) + "  " + "  ".join(str(c).ljust(w) for c, w in zip(df.columns, widths[1:]))
+                yield f"    {header.rstrip()}\n", (tag,)
+                for row in df.itertuples():
+                    cells = ['' if value != value else str(value) for value in row]  # NaN != NaN
+                    line = cells[0].ljust(widths[0]) + "  " + "  ".join(c.ljust(w) for c, w in zip(cells[1:], widths[1:]))
+                    yield f"    {line.rstrip()}\n", (tag,)
+            yield "\n", (tag,)
+
+    @timed('render.chunk')
+    def _insert_chunk(self):
+        self._job = None
+        if self._lines is None:
+            return
+        chunk = []
+        for line in self._lines:
+            chunk.extend(line)
+            if len(chunk) >= 2 * self.chunk_lines:
+                break
+        else:
+            self._lines = None
+        if chunk:
+            self.text.insert(tk.END, *chunk)
+        if self._lines is not None:
+            self._job = self.after(1, self._insert_chunk)
+
+    def toggle(self, tag):
+        collapsed = not self._collapsed[tag]
+        self._collapsed[tag] = collapsed
+        self.text.tag_configure(tag, elide=collapsed)
+        start = self.text.tag_ranges(f'{tag}.title')[0]
+        self.text.delete(start, f'{start}+1c')
+        self.text.insert(start, "\u25b8" if collapsed else "\u25be", ('title', f'{tag}.title'))
+
+
+class EntryList(ttk.Frame):
+    """Paged Treeview of lessons/exams or routines for the Edit and Delete tabs.
+
+    Only one page (ENTRY_PAGE_SIZE rows) is ever inserted into the tree; searching and
+    sorting happen in data_manager.query_entries, so opening a list costs the same whatever
+    the size of the timetable. Click the Name or Date/Day heading to sort by it.
+
+    Tree items are keyed by entry ID, so after an edit or delete refresh_rows() re-reads just
+    those entries and updates or drops their items in place.
+    """
+
+    def __init__(self, parent, runner, on_select=None):
+        super().__init__(parent)
+        self.runner = runner
+        self.on_select = on_select
+        self.entry_type = None
+        self.sort_by = 'date'
+        self.descending = False
+        self.offset = 0
+        self.total = 0
+
+        tk.Label(self, text="Search:").grid(row=0, column=0, sticky='e')
+        self.search_entry = tk.Entry(self)
+        self.search_entry.grid(row=0, column=1, sticky='we')
+        self.search_entry.bind('<Return>', lambda event: self.search())
+        ttk.Button(self, text="Search", command=self.search).grid(row=0, column=2)
+
+        self.tree = ttk.Treeview(self, columns=('ID', 'Name', 'Date/Day', 'Start', 'End'), show='headings')
+        self.tree.heading('ID', text='ID')
+        self.tree.heading('Name', text='Name', command=lambda: self.sort('name'))
+        self.tree.heading('Date/Day', text='Date/Day', command=lambda: self.sort('date'))
+        self.tree.heading('Start', text='Start')
+        self.tree.heading('End', text='End')
+        self.tree.grid(row=1, column=0, columnspan=3)
+        self.tree.bind('<<TreeviewSelect>>', self._selected)
+
+        ttk.Button(self, text="< Prev", command=lambda: self.page(-1)).grid(row=2, column=0)
+        self.page_label = tk.Label(self, text="")
+        self.page_label.grid(row=2, column=1)
+        ttk.Button(self, text="Next >", command=lambda: self.page(1)).grid(row=2, column=2)
+
+    def load(self, entry_type):
+        self.entry_type = entry_type
+        self.offset = 0
+        self.refresh()
+
+    def search(self):
+        self.offset = 0
+        self.refresh()
+
+    def sort(self, sort_by):
+        self.descending = not self.descending if sort_by == self.sort_by else False
+        self.sort_by = sort_by
+        self.offset = 0
+        self.refresh()
+
+    def page(self, step):
+        offset = self.offset + step * ENTRY_PAGE_SIZE
+        if 0 <= offset < self.total:
+            self.offset = offset
+            self.refresh()
+
+    def refresh(self):
+        if self.entry_type not in ('lesson/exam', 'routine'):
+            self.tree.delete(*self.tree.get_children())
+            self.page_label.config(text="")
+            return
+        args = (self.entry_type, self.search_entry.get(), self.sort_by, self.descending, self.offset)
+        self.runner.submit(('list', id(self)), self._fetch, *args, on_done=self._show)
+
+    @staticmethod
+    def _fetch(entry_type, search, sort_by, descending, offset):
+        rows, total = query_entries(entry_type, search, sort_by, descending, offset)
+        if total and offset >= total:  # page emptied by deletes
+            offset = max(0, (total - 1) // ENTRY_PAGE_SIZE * ENTRY_PAGE_SIZE)
+            rows, total = query_entries(entry_type, search, sort_by, descending, offset)
+        return offset, total, EntryList._values(entry_type, rows)
+
+    @staticmethod
+    def _values(entry_type, rows):
+        day_column = 'Date' if entry_type == 'lesson/exam' else 'Day_of_Week'
+        return list(zip(rows['ID'], rows['Name'], rows[day_column], rows['Start_Time'], rows['End_Time']))
+
+    @timed('gui.treeview_insert')
+    def _show(self, result):
+        self.offset, self.total, values = result
+        self.tree.delete(*self.tree.get_children())
+        for row in values:
+            self.tree.insert('', 'end', iid=row[0], values=row)
+        self._update_label()
+
+    def _update_label(self):
+        last = min(self.offset + ENTRY_PAGE_SIZE, self.total)
+        self.page_label.config(text=f"{self.offset + 1 if self.total else 0}-{last} of {self.total}")
+
+    def refresh_rows(self, ids):
+        """Re-read only the given entries and update (or remove) their items on this page."""
+        ids = [entry_id for entry_id in ids if self.tree.exists(entry_id)]
+        if ids:
+            self.runner.submit(('rows', id(self)), self._fetch_rows, self.entry_type, ids, on_done=self._show_rows)
+
+    @staticmethod
+    def _fetch_rows(entry_type, ids):
+        return ids, EntryList._values(entry_type, get_entries(entry_type, ids))
+
+    @timed('gui.treeview_update')
+    def _show_rows(self, result):
+        ids, values = result
+        # The list may have been paged or searched since the refresh was submitted
+        for row in values:
+            if self.tree.exists(row[0]):
+                self.tree.item(row[0], values=row)
+        gone = [entry_id for entry_id in set(ids) - {row[0] for row in values} if self.tree.exists(entry_id)]
+        if gone:
+            self.tree.delete(*gone)
+        self.total -= len(gone)
+        self._update_label()
+
+    def _selected(self, event):
+        selection = self.tree.selection()
+        if selection and self.on_select:
+            self.on_select(", ".join(selection))
+
 
 class TimetableApp(tk.Tk):
     def __init__(self):
@@ -13,6 +246,35 @@ class TimetableApp(tk.Tk):
         self.geometry("800x600")
         initialize_files()
 
+        # Status bar with a busy indicator while background work runs
+        self.status_bar = ttk.Frame(self)
+        self.status_bar.pack(side='bottom', fill='x')
+        self.status_label = tk.Label(self.status_bar, text="Ready", anchor='w')
+        self.status_label.pack(side='left', fill='x', expand=True)
+        self.progress = ttk.Progressbar(self.status_bar, mode='indeterminate', length=120)
+        self.progress.pack(side='right', padx=5)
+        self.runner = BackgroundRunner(self, on_busy=self.set_busy)
+
+        # File menu for bulk import/export
+        menubar = tk.Menu(self)
+        file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="Import CSV/iCalendar...", command=self.import_file)
+        file_menu.add_command(label="Export to iCalendar...", command=self.export_file)
+        menubar.add_cascade(label="File", menu=file_menu)
+
+        # Debug menu: timings in the status bar, JSON dump and one-shot cProfile
+        self.instrument_var = tk.BooleanVar(value=instrumentation.enabled())
+        debug_menu = tk.Menu(menubar, tearoff=0)
+        debug_menu.add_checkbutton(label="Record timings", variable=self.instrument_var, command=self.toggle_instrumentation)
+        debug_menu.add_command(label="Profile next action", command=instrumentation.profile_next)
+        debug_menu.add_command(label="Save timings as JSON...", command=self.dump_stats)
+        menubar.add_cascade(label="Debug", menu=debug_menu)
+        self.config(menu=menubar)
+        self.stats_label = tk.Label(self.status_bar, text="", anchor='e')
+        self.stats_label.pack(side='right', padx=5)
+        self.stats_job = None
+        self.update_stats()
+
         # Notebook for tabs
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(expand=True, fill='both')
@@ -23,22 +285,91 @@ class TimetableApp(tk.Tk):
         self.edit_tab = ttk.Frame(self.notebook)
         self.delete_tab = ttk.Frame(self.notebook)
         self.conflicts_tab = ttk.Frame(self.notebook)
+        self.free_tab = ttk.Frame(self.notebook)
 
         self.notebook.add(self.add_tab, text='Add Entry')
         self.notebook.add(self.view_tab, text='View Schedule')
         self.notebook.add(self.edit_tab, text='Edit Entry')
         self.notebook.add(self.delete_tab, text='Delete Entry')
         self.notebook.add(self.conflicts_tab, text='Check Conflicts')
+        self.notebook.add(self.free_tab, text='Free Time')
 
         self.setup_add_tab()
         self.setup_view_tab()
         self.setup_edit_tab()
         self.setup_delete_tab()
         self.setup_conflicts_tab()
+        self.setup_free_tab()
 
         # Start reminders in background
         threading.Thread(target=check_reminders, daemon=True).start()
 
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        # Let queued writes land, then fold the write journal back into the CSVs
+        try:
+            self.runner.shutdown()
+            store.compact()
+        finally:
+            self.destroy()
+
+    def set_busy(self, busy):
+        if busy:
+            self.status_label.config(text="Working...")
+            self.progress.start(10)
+        else:
+            self.status_label.config(text="Ready")
+            self.progress.stop()
+
+    @timed('gui.import_file')
+    def import_file(self):
+        path = filedialog.askopenfilename(filetypes=[("Timetable files", "*.csv *.ics"), ("All files", "*.*")])
+        if not path:
+            return
+        importer = import_ics if path.lower().endswith('.ics') else import_csv
+        self.runner.submit('import', importer, path, on_done=self._imported, on_error=self.show_error, write=True)
+
+    def _imported(self, report):
+        messagebox.showinfo("Import", report.summary())
+        self.edit_list.refresh()
+        self.delete_list.refresh()
+
+    @timed('gui.export_file')
+    def export_file(self):
+        path = filedialog.asksaveasfilename(defaultextension='.ics', filetypes=[("iCalendar", "*.ics")])
+        if not path:
+            return
+        self.runner.submit('export', export_ics, path, on_done=self._exported, on_error=self.show_error)
+
+    def _exported(self, written):
+        messagebox.showinfo("Export", f"Exported {written} events.")
+
+    def toggle_instrumentation(self):
+        instrumentation.enable(self.instrument_var.get())
+        if self.stats_job is None:
+            self.update_stats()
+
+    def update_stats(self):
+        # Rolling stats, refreshed once a second while recording
+        if instrumentation.enabled():
+            self.stats_label.config(text=instrumentation.summary())
+            self.stats_job = self.after(1000, self.update_stats)
+        else:
+            self.stats_label.config(text="")
+            self.stats_job = None
+
+    def dump_stats(self):
+        path = filedialog.asksaveasfilename(defaultextension='.json', filetypes=[("JSON", "*.json")])
+        if path:
+            instrumentation.dump(path)
+
+    def show_error(self, error, prefix=""):
+        if isinstance(error, ValueError):
+            messagebox.showerror("Error", f"{prefix}{str(error)}")
+        else:
+            messagebox.showerror("Error", f"An unexpected error occurred: {str(error)}")
+
     def setup_add_tab(self):
         tk.Label(self.add_tab, text="Entry Type:").grid(row=0, column=0, pady=5)
         self.entry_type = tk.StringVar()
@@ -72,8 +403,13 @@ class TimetableApp(tk.Tk):
         self.notes_entry = tk.Entry(self.add_tab)
         self.notes_entry.grid(row=7, column=1)
 
-        ttk.Button(self.add_tab, text="Add", command=self.add_entry).grid(row=8, column=1, pady=10)
+        tk.Label(self.add_tab, text="Repeat (for Lesson/Exam, e.g., weekly;BYDAY=MO,WE;UNTIL=2026-05-01):").grid(row=8, column=0, pady=5)
+        self.repeat_entry = tk.Entry(self.add_tab)
+        self.repeat_entry.grid(row=8, column=1)
+
+        ttk.Button(self.add_tab, text="Add", command=self.add_entry).grid(row=9, column=1, pady=10)
 
+    @timed('gui.add_entry')
     def add_entry(self):
         entry_type = self.entry_type.get().lower()
         name = self.name_entry.get().strip()
@@ -89,39 +425,44 @@ class TimetableApp(tk.Tk):
             messagebox.showerror("Error", "Start and End times are required.")
             return
 
-        try:
-            if entry_type in ['lesson', 'exam']:
-                date = self.date_entry.get().strip()
-                location = self.location_entry.get().strip()
-                if not date:
-                    raise ValueError("Date is required for Lesson/Exam.")
-                add_lesson_exam(entry_type, name, date, start_time, end_time, location, notes)
-            elif entry_type == 'routine':
-                day_of_week = self.day_week_entry.get().strip()
-                if not day_of_week:
-                    raise ValueError("Day of Week is required for Routine.")
-                add_routine(name, start_time, end_time, day_of_week, notes)
-            else:
-                raise ValueError("Invalid entry type selected.")
-
-            messagebox.showinfo("Success", "Entry added!")
-            # Clear fields after success
-            self.name_entry.delete(0, tk.END)
-            self.start_time_entry.delete(0, tk.END)
-            self.end_time_entry.delete(0, tk.END)
-            self.day_week_entry.delete(0, tk.END)
-            self.location_entry.delete(0, tk.END)
-            self.notes_entry.delete(0, tk.END)
-            self.date_entry.delete(0, tk.END)
-        except ValueError as ve:
-            messagebox.showerror("Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
+        if entry_type in ['lesson', 'exam']:
+            date = self.date_entry.get().strip()
+            location = self.location_entry.get().strip()
+            if not date:
+                messagebox.showerror("Error", "Date is required for Lesson/Exam.")
+                return
+            repeat = self.repeat_entry.get().strip()
+            args = (add_lesson_exam, entry_type, name, date, start_time, end_time, location, notes, repeat)
+        elif entry_type == 'routine':
+            day_of_week = self.day_week_entry.get().strip()
+            if not day_of_week:
+                messagebox.showerror("Error", "Day of Week is required for Routine.")
+                return
+            args = (add_routine, name, start_time, end_time, day_of_week, notes)
+        else:
+            messagebox.showerror("Error", "Invalid entry type selected.")
+            return
+
+        self.runner.submit('add', *args, on_done=self._entry_added, on_error=self.show_error, write=True)
+
+    def _entry_added(self, result):
+        messagebox.showinfo("Success", "Entry added!")
+        # Clear fields after success
+        self.name_entry.delete(0, tk.END)
+        self.start_time_entry.delete(0, tk.END)
+        self.end_time_entry.delete(0, tk.END)
+        self.day_week_entry.delete(0, tk.END)
+        self.location_entry.delete(0, tk.END)
+        self.notes_entry.delete(0, tk.END)
+        self.date_entry.delete(0, tk.END)
+        self.repeat_entry.delete(0, tk.END)
 
     def setup_view_tab(self):
         tk.Label(self.view_tab, text="View Type:").grid(row=0, column=0, pady=5)
         self.view_type = tk.StringVar()
-        ttk.Combobox(self.view_tab, textvariable=self.view_type, values=['Daily', 'Weekly', 'Semester', 'Upcoming']).grid(row=0, column=1)
+        view_choice = ttk.Combobox(self.view_tab, textvariable=self.view_type, values=['Daily', 'Weekly', 'Semester', 'Upcoming'])
+        view_choice.grid(row=0, column=1)
+        view_choice.bind('<<ComboboxSelected>>', self._view_changed)
 
         tk.Label(self.view_tab, text="Date/Start Date (YYYY-MM-DD):").grid(row=1, column=0, pady=5)
         self.view_date = tk.Entry(self.view_tab)
@@ -129,11 +470,17 @@ class TimetableApp(tk.Tk):
 
         ttk.Button(self.view_tab, text="View", command=self.view_schedule).grid(row=2, column=1, pady=10)
 
-        self.view_text = tk.Text(self.view_tab, height=20, width=80)
-        self.view_text.grid(row=3, column=0, columnspan=2)
+        self.schedule_view = ScheduleView(self.view_tab)
+        self.schedule_view.grid(row=3, column=0, columnspan=2)
 
+    def _view_changed(self, event):
+        # Neither the view still being fetched nor the one still being drawn is wanted now
+        self.runner.cancel('view')
+        self.schedule_view.cancel()
+
+    @timed('gui.view_schedule')
     def view_schedule(self):
-        self.view_text.delete(1.0, tk.END)
+        self.schedule_view.clear()
         view_type = self.view_type.get().lower()
         date = self.view_date.get().strip()
 
@@ -141,22 +488,40 @@ class TimetableApp(tk.Tk):
             messagebox.showerror("Error", "Date is required for this view.")
             return
 
-        try:
-            if view_type == 'daily':
-                lessons, routines = get_daily_schedule(date)
-                self.view_text.insert(tk.END, "Lessons/Exams:\n" + lessons.to_string() + "\n\nRoutines:\n" + routines.to_string())
-            elif view_type == 'weekly':
-                weekly = get_weekly_schedule(date)
-                for day, (lessons, routines) in weekly.items():
-                    self.view_text.insert(tk.END, f"{day}:\nLessons/Exams:\n{lessons.to_string() if not lessons.empty else 'None'}\nRoutines:\n{routines.to_string() if not routines.empty else 'None'}\n\n")
-            elif view_type == 'semester':
-                lessons, routines = get_semester_schedule()
-                self.view_text.insert(tk.END, "All Lessons/Exams:\n" + lessons.to_string() + "\n\nAll Routines:\n" + routines.to_string())
-            elif view_type == 'upcoming':
-                upcoming = get_upcoming_events()
-                self.view_text.insert(tk.END, "Upcoming Events:\n" + upcoming.to_string())
-        except ValueError as ve:
-            messagebox.showerror("Error", f"Invalid date format: {str(ve)}")
+        self.runner.submit('view', self._schedule_sections, view_type, date,
+                           on_done=self.schedule_view.show,
+                           on_error=lambda e: self.show_error(e, "Invalid date format: "))
+
+    @staticmethod
+    def _schedule_sections(view_type, date):
+        # Runs on a worker thread: picks the rows and column widths, never touches widgets
+        def part(subtitle, df):
+            df = df.drop(columns='ID')  # internal key, not worth a column in a schedule
+            return subtitle, df, _column_widths(df)
+
+        if view_type == 'daily':
+            lessons, routines = get_daily_schedule(date)
+            return [("Lessons/Exams", [part(None, lessons)]), ("Routines", [part(None, routines)])]
+        elif view_type == 'weekly':
+            return [
+                (f"{day} ({datetime.strptime(day, '%Y-%m-%d').strftime('%A')})",
+                 [part("Lessons/Exams", lessons), part("Routines", routines)])
+                for day, (lessons, routines) in get_weekly_schedule(date).items()
+            ]
+        elif view_type == 'semester':
+            lessons, routines = get_semester_schedule()
+            lessons = lessons.drop(columns='ID')
+            widths = _column_widths(lessons)
+            dates = lessons['Date'].fillna('').astype(str).to_numpy()
+            bounds = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1], True]) if len(dates) else np.array([0])
+            sections = [
+                (f"{dates[lo] or 'No date'} ({hi - lo} entries)", [(None, lessons.iloc[lo:hi], widths)])
+                for lo, hi in zip(bounds[:-1], bounds[1:])
+            ]
+            return sections + [("All Routines", [part(None, routines)])]
+        elif view_type == 'upcoming':
+            return [("Upcoming Events", [part(None, get_upcoming_events())])]
+        return []
 
     def setup_edit_tab(self):
         tk.Label(self.edit_tab, text="Entry Type:").grid(row=0, column=0, pady=5)
@@ -165,16 +530,11 @@ class TimetableApp(tk.Tk):
 
         ttk.Button(self.edit_tab, text="Load Entries", command=self.load_for_edit).grid(row=1, column=1, pady=5)
 
-        self.edit_tree = ttk.Treeview(self.edit_tab, columns=('Index', 'Name', 'Date/Day', 'Start', 'End'), show='headings')
-        self.edit_tree.heading('Index', text='Index')
-        self.edit_tree.heading('Name', text='Name')
-        self.edit_tree.heading('Date/Day', text='Date/Day')
-        self.edit_tree.heading('Start', text='Start')
-        self.edit_tree.heading('End', text='End')
-        self.edit_tree.grid(row=2, column=0, columnspan=2)
+        self.edit_list = EntryList(self.edit_tab, self.runner, on_select=lambda ids: self._set_entry(self.edit_index, ids))
+        self.edit_list.grid(row=2, column=0, columnspan=2)
 
-        # Form for editing
-        tk.Label(self.edit_tab, text="Selected Index:").grid(row=3, column=0, pady=5)
+        # Form for editing; the changes apply to every selected entry
+        tk.Label(self.edit_tab, text="Selected ID(s):").grid(row=3, column=0, pady=5)
         self.edit_index = tk.Entry(self.edit_tab)
         self.edit_index.grid(row=3, column=1)
 
@@ -198,26 +558,30 @@ class TimetableApp(tk.Tk):
         self.edit_extra = tk.Entry(self.edit_tab)
         self.edit_extra.grid(row=8, column=1)
 
-        ttk.Button(self.edit_tab, text="Update", command=self.update_entry).grid(row=9, column=1, pady=10)
+        tk.Label(self.edit_tab, text="New Repeat rule (Lesson/Exam, 'none' to stop repeating):").grid(row=9, column=0, pady=5)
+        self.edit_repeat = tk.Entry(self.edit_tab)
+        self.edit_repeat.grid(row=9, column=1)
+
+        ttk.Button(self.edit_tab, text="Update", command=self.update_entry).grid(row=10, column=1, pady=10)
 
+    def _set_entry(self, entry, value):
+        entry.delete(0, tk.END)
+        entry.insert(0, value)
+
+    @timed('gui.load_for_edit')
     def load_for_edit(self):
-        self.edit_tree.delete(*self.edit_tree.get_children())
-        entry_type = self.edit_type.get().lower()
-        if entry_type == 'lesson/exam':
-            df = load_lessons()
-            for idx, row in df.iterrows():
-                self.edit_tree.insert('', 'end', values=(idx, row['Name'], row['Date'], row['Start_Time'], row['End_Time']))
-        elif entry_type == 'routine':
-            df = load_routines()
-            for idx, row in df.iterrows():
-                self.edit_tree.insert('', 'end', values=(idx, row['Name'], row['Day_of_Week'], row['Start_Time'], row['End_Time']))
+        self.edit_list.load(self.edit_type.get().lower())
 
+    @staticmethod
+    def _ids(entry):
+        return [entry_id.strip() for entry_id in entry.get().split(',') if entry_id.strip()]
+
+    @timed('gui.update_entry')
     def update_entry(self):
         entry_type = self.edit_type.get().lower()
-        try:
-            index = int(self.edit_index.get())
-        except ValueError:
-            messagebox.showerror("Error", "Invalid index")
+        ids = self._ids(self.edit_index)
+        if not ids:
+            messagebox.showerror("Error", "Select an entry to update.")
             return
 
         updates = {}
@@ -237,18 +601,16 @@ class TimetableApp(tk.Tk):
                 updates['Location'] = self.edit_extra.get()
             else:
                 updates['Notes'] = self.edit_extra.get()
+        if self.edit_repeat.get() and entry_type == 'lesson/exam':
+            repeat = self.edit_repeat.get().strip()
+            updates['Repeat'] = '' if repeat.lower() == 'none' else repeat
 
-        try:
-            if entry_type == 'lesson/exam':
-                edit_lesson_exam(index, updates)
-            else:
-                edit_routine(index, updates)
-            messagebox.showinfo("Success", "Entry updated!")
-            self.load_for_edit()
-        except ValueError as ve:
-            messagebox.showerror("Error", str(ve))
-        except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
+        self.runner.submit('edit', update_many, entry_type, {entry_id: updates for entry_id in ids},
+                           on_done=lambda result: self._entry_updated(ids), on_error=self.show_error, write=True)
+
+    def _entry_updated(self, ids):
+        messagebox.showinfo("Success", "Entry updated!" if len(ids) == 1 else f"{len(ids)} entries updated!")
+        self.edit_list.refresh_rows(ids)
 
     def setup_delete_tab(self):
         tk.Label(self.delete_tab, text="Entry Type:").grid(row=0, column=0, pady=5)
@@ -257,69 +619,105 @@ class TimetableApp(tk.Tk):
 
         ttk.Button(self.delete_tab, text="Load Entries", command=self.load_for_delete).grid(row=1, column=1, pady=5)
 
-        self.delete_tree = ttk.Treeview(self.delete_tab, columns=('Index', 'Name', 'Date/Day', 'Start', 'End'), show='headings')
-        self.delete_tree.heading('Index', text='Index')
-        self.delete_tree.heading('Name', text='Name')
-        self.delete_tree.heading('Date/Day', text='Date/Day')
-        self.delete_tree.heading('Start', text='Start')
-        self.delete_tree.heading('End', text='End')
-        self.delete_tree.grid(row=2, column=0, columnspan=2)
+        self.delete_list = EntryList(self.delete_tab, self.runner, on_select=lambda ids: self._set_entry(self.delete_index, ids))
+        self.delete_list.grid(row=2, column=0, columnspan=2)
 
-        tk.Label(self.delete_tab, text="Index to Delete:").grid(row=3, column=0, pady=5)
+        tk.Label(self.delete_tab, text="ID(s) to Delete:").grid(row=3, column=0, pady=5)
         self.delete_index = tk.Entry(self.delete_tab)
         self.delete_index.grid(row=3, column=1)
 
         ttk.Button(self.delete_tab, text="Delete", command=self.delete_entry).grid(row=4, column=1, pady=10)
 
+    @timed('gui.load_for_delete')
     def load_for_delete(self):
-        self.delete_tree.delete(*self.delete_tree.get_children())
-        entry_type = self.delete_type.get().lower()
-        if entry_type == 'lesson/exam':
-            df = load_lessons()
-            for idx, row in df.iterrows():
-                self.delete_tree.insert('', 'end', values=(idx, row['Name'], row['Date'], row['Start_Time'], row['End_Time']))
-        elif entry_type == 'routine':
-            df = load_routines()
-            for idx, row in df.iterrows():
-                self.delete_tree.insert('', 'end', values=(idx, row['Name'], row['Day_of_Week'], row['Start_Time'], row['End_Time']))
+        self.delete_list.load(self.delete_type.get().lower())
 
+    @timed('gui.delete_entry')
     def delete_entry(self):
         entry_type = self.delete_type.get().lower()
-        try:
-            index = int(self.delete_index.get())
-        except ValueError:
-            messagebox.showerror("Error", "Invalid index")
+        ids = self._ids(self.delete_index)
+        if not ids:
+            messagebox.showerror("Error", "Select an entry to delete.")
             return
 
-        if entry_type == 'lesson/exam':
-            delete_lesson_exam(index)
-        else:
-            delete_routine(index)
-        messagebox.showinfo("Success", "Entry deleted!")
-        self.load_for_delete()
+        self.runner.submit('delete', delete_many, entry_type, ids,
+                           on_done=lambda result: self._entry_deleted(ids), on_error=self.show_error, write=True)
+
+    def _entry_deleted(self, ids):
+        messagebox.showinfo("Success", "Entry deleted!" if len(ids) == 1 else f"{len(ids)} entries deleted!")
+        self.delete_index.delete(0, tk.END)
+        self.delete_list.refresh_rows(ids)
 
     def setup_conflicts_tab(self):
-        tk.Label(self.conflicts_tab, text="Date to Check (YYYY-MM-DD):").grid(row=0, column=0, pady=5)
+        tk.Label(self.conflicts_tab, text="Date to Check (YYYY-MM-DD, blank for whole timetable):").grid(row=0, column=0, pady=5)
         self.conflicts_date = tk.Entry(self.conflicts_tab)
         self.conflicts_date.grid(row=0, column=1)
 
-        ttk.Button(self.conflicts_tab, text="Check", command=self.show_conflicts).grid(row=1, column=1, pady=10)
+        tk.Label(self.conflicts_tab, text="Through Date (optional, YYYY-MM-DD):").grid(row=1, column=0, pady=5)
+        self.conflicts_end_date = tk.Entry(self.conflicts_tab)
+        self.conflicts_end_date.grid(row=1, column=1)
+
+        ttk.Button(self.conflicts_tab, text="Check", command=self.show_conflicts).grid(row=2, column=1, pady=10)
 
         self.conflicts_text = tk.Text(self.conflicts_tab, height=20, width=80)
-        self.conflicts_text.grid(row=2, column=0, columnspan=2)
+        self.conflicts_text.grid(row=3, column=0, columnspan=2)
 
+    @timed('gui.show_conflicts')
     def show_conflicts(self):
         self.conflicts_text.delete(1.0, tk.END)
-        date = self.conflicts_date.get().strip()
-        if not date:
-            messagebox.showerror("Error", "Date is required.")
-            return
-        try:
-            conflicts = check_conflicts(date)
-            if not conflicts:
-                self.conflicts_text.insert(tk.END, "No conflicts.")
-            else:
-                for c in conflicts:
-                    self.conflicts_text.insert(tk.END, c + "\n")
-        except ValueError as ve:
-            messagebox.showerror("Error", f"Invalid date format: {str(ve)}")
\ No newline at end of file
+        date = self.conflicts_date.get().strip() or None
+        end_date = self.conflicts_end_date.get().strip() or date
+        self.runner.submit('conflicts', self._render_conflicts, date, end_date,
+                           on_done=lambda text: self.conflicts_text.insert(tk.END, text),
+                           on_error=lambda e: self.show_error(e, "Invalid date format: "))
+
+    @staticmethod
+    def _render_conflicts(date, end_date):
+        conflicts = find_conflicts(date, end_date)
+        if conflicts.empty:
+            return "No conflicts."
+        lines = [
+            f"{row.Date}: {row.First} ({row.First_Type}, {row.First_Start}-{row.First_End}) overlaps "
+            f"{row.Second} ({row.Second_Type}, {row.Second_Start}-{row.Second_End})"
+            for row in conflicts.itertuples(index=False)
+        ]
+        return f"{len(lines)} conflict(s):\n" + "\n".join(lines)
+
+    def setup_free_tab(self):
+        self.free_entries = {}
+        fields = [('start', "From Date (YYYY-MM-DD, blank for today):", ''),
+                  ('end', "Through Date (optional, a week by default):", ''),
+                  ('duration', "Duration (minutes or H:MM):", '60'),
+                  ('earliest', "Earliest Start (HH:MM):", FREE_SLOT_HOURS[0]),
+                  ('latest', "Latest End (HH:MM):", FREE_SLOT_HOURS[1]),
+                  ('weekdays', "Days (e.g. Mon,Wed, blank for all):", ''),
+                  ('buffer', "Buffer Around Events (minutes):", '0')]
+        for row, (key, label, default) in enumerate(fields):
+            tk.Label(self.free_tab, text=label).grid(row=row, column=0, pady=5)
+            self.free_entries[key] = tk.Entry(self.free_tab)
+            self.free_entries[key].insert(0, default)
+            self.free_entries[key].grid(row=row, column=1)
+
+        ttk.Button(self.free_tab, text="Find", command=self.find_free_time).grid(row=len(fields), column=1, pady=10)
+
+        self.free_text = tk.Text(self.free_tab, height=20, width=80)
+        self.free_text.grid(row=len(fields) + 1, column=0, columnspan=2)
+
+    @timed('gui.find_free_time')
+    def find_free_time(self):
+        self.free_text.delete(1.0, tk.END)
+        values = {key: entry.get().strip() for key, entry in self.free_entries.items()}
+        start = values.pop('start') or datetime.now().strftime('%Y-%m-%d')
+        end, duration = values.pop('end') or None, values.pop('duration')
+        self.runner.submit('free', self._render_free_slots, start, end, duration, values,
+                           on_done=lambda text: self.free_text.insert(tk.END, text),
+                           on_error=self.show_error)
+
+    @staticmethod
+    def _render_free_slots(start, end, duration, constraints):
+        slots = find_free_slots(start, end, duration, constraints)
+        if slots.empty:
+            return "No free slot that long."
+        lines = [f"{row.Date} ({row.Day_of_Week[:3]}) {row.Start_Time}-{row.End_Time}  {row.Minutes // 60}h{row.Minutes % 60:02d}"
+                 for row in slots.itertuples(index=False)]
+        return f"{len(lines)} free slot(s):\n" + "\n".join(lines)
@@ -0,0 +1,301 @@
+# timetable_app/import_export.py
+
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from data_manager import WEEKDAYS, store, validate_lessons, validate_routines
+from recurrence import parse_rule
+
+# Rows read, validated and committed per batch
+IMPORT_CHUNK_SIZE = 50_000
+EXPORT_CHUNK_SIZE = 10_000
+
+# Only the first few bad rows are kept with their messages; the rest are just counted
+MAX_REPORTED_ERRORS = 100
+
+ICS_WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+class ImportReport:
+    """Outcome of a bulk import: counts, the first MAX_REPORTED_ERRORS rejected rows
+    as (line number, message), and the elapsed time."""
+
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return (self.imported + self.rejected) / self.seconds if self.seconds else 0.0
+
+    def add_errors(self, errors, line_offset):
+        self.rejected += len(errors)
+        room = MAX_REPORTED_ERRORS - len(self.errors)
+        self.errors.extend((line_offset + position, message) for position, message in errors[:max(room, 0)])
+
+    def summary(self):
+        lines = [f"Imported {self.imported} rows, rejected {self.rejected} "
+                 f"in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)."]
+        lines += [f"Line {line}: {message}" for line, message in self.errors]
+        if self.rejected > len(self.errors):
+            lines.append(f"... and {self.rejected - len(self.errors)} more.")
+        return "\n".join(lines)
+
+
+def _commit(kind, chunk, report, line_offset):
+    validate = validate_lessons if kind == 'lessons' else validate_routines
+    rows, errors = validate(chunk)
+    report.add_errors(errors, line_offset)
+    if len(rows):
+        # Appended straight to the CSV/database, so only one batch is ever held in memory
+        store.import_rows(kind, rows)
+        report.imported += len(rows)
+
+
+def import_csv(path, kind=None, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Stream a CSV in the lessons_exams.csv or daily_routines.csv layout into the timetable.
+
+    kind is 'lessons' or 'routines'; by default it is taken from the header (a Date column
+    means lessons). Rows are validated like add_lesson_exam/add_routine and each chunk is
+    appended straight to storage in a single write, so memory stays bounded by chunk_size
+    however long the file is; bad rows are reported, not fatal. progress(rows_done) is
+    called after every chunk.
+    """
+    report = ImportReport()
+    started = time.perf_counter()
+    reader = pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    line = 2  # first data row, after the header
+    with reader:
+        for chunk in reader:
+            if kind is None:
+                kind = 'lessons' if 'Date' in chunk.columns else 'routines'
+            _commit(kind, chunk, report, line)
+            line += len(chunk)
+            if progress:
+                progress(line - 2)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _unescape(text):
+    return (text.replace('\\n', '\n').replace('\\N', '\n').replace('\\,', ',')
+            .replace('\\;', ';').replace('\\\\', '\\'))
+
+
+def _ics_lines(f):
+    """Unfolded content lines with the line number each one started on."""
+    current, start = None, 0
+    for number, raw in enumerate(f, 1):
+        raw = raw.rstrip('\r\n')
+        if raw[:1] in (' ', '\t') and current is not None:
+            current += raw[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current, start = raw, number
+    if current is not None:
+        yield start, current
+
+
+def _ics_datetime(value):
+    """(YYYY-MM-DD, HH:MM) from an ICS DATE-TIME; the time is '' for all-day DATE values."""
+    value = value.rstrip('Z')
+    date = f"{value[0:4]}-{value[4:6]}-{value[6:8]}" if len(value) >= 8 else value
+    time_part = f"{value[9:11]}:{value[11:13]}" if len(value) >= 13 and value[8] == 'T' else ''
+    return date, time_part
+
+
+def _ics_repeat(rrule, exdates):
+    """Repeat value for an RRULE and its EXDATEs; rules beyond DAILY/WEEKLY are passed on
+    as they are, so validation rejects them."""
+    if not rrule:
+        return ''
+    parts = []
+    for part in rrule.split(';'):
+        key, _, value = part.partition('=')
+        key = key.upper()
+        if key == 'WKST':
+            continue
+        if key == 'UNTIL':
+            value = _ics_datetime(value)[0]
+        parts.append(f"{key}={value}")
+    dates = [_ics_datetime(value)[0] for value in exdates.split(',') if value]
+    if dates:
+        parts.append("EXDATE=" + ",".join(dates))
+    return ";".join(parts)
+
+
+def import_ics(path, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Stream the VEVENTs of an iCalendar file into lessons/exams.
+
+    Each event becomes one lesson (an Exam when its CATEGORIES or SUMMARY says so) on its
+    DTSTART date. A daily or weekly RRULE, with its EXDATEs, becomes the lesson's Repeat
+    rule. Times are taken as written, without time zone conversion.
+    """
+    report = ImportReport()
+    started = time.perf_counter()
+    batch, batch_lines, event, event_line = [], [], None, 0
+    done = 0
+
+    def flush():
+        nonlocal batch, batch_lines, done
+        if not batch:
+            return
+        rows, errors = validate_lessons(pd.DataFrame(batch))
+        report.add_errors([(batch_lines[position], message) for position, message in errors], 0)
+        if len(rows):
+            store.import_rows('lessons', rows)
+            report.imported += len(rows)
+        done += len(batch)
+        batch, batch_lines = [], []
+        if progress:
+            progress(done)
+
+    with open(path, encoding='utf-8') as f:
+        for number, line in _ics_lines(f):
+            name, _, value = line.partition(':')
+            prop, *params = name.upper().split(';')
+            if prop == 'BEGIN' and value.upper() == 'VEVENT':
+                event, event_line = {}, number
+            elif prop == 'END' and value.upper() == 'VEVENT' and event is not None:
+                summary = event.get('SUMMARY', '')
+                categories = event.get('CATEGORIES', '')
+                date, start = _ics_datetime(event.get('DTSTART', ''))
+                _, end = _ics_datetime(event.get('DTEND', ''))
+                batch.append({
+                    'Type': 'Exam' if 'exam' in f"{categories} {summary}".lower() else 'Lesson',
+                    'Name': summary,
+                    'Date': date,
+                    'Start_Time': start,
+                    'End_Time': end,
+                    'Location': event.get('LOCATION', ''),
+                    'Notes': event.get('DESCRIPTION', ''),
+                    'Repeat': _ics_repeat(event.get('RRULE', ''), event.get('EXDATE', '')),
+                })
+                batch_lines.append(event_line)
+                event = None
+                if len(batch) >= chunk_size:
+                    flush()
+            elif event is not None and prop == 'EXDATE':
+                event['EXDATE'] = f"{event['EXDATE']},{value}" if 'EXDATE' in event else value
+            elif event is not None and prop in ('SUMMARY', 'DTSTART', 'DTEND', 'LOCATION', 'DESCRIPTION', 'CATEGORIES', 'RRULE'):
+                event[prop] = _unescape(value)
+    flush()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _escape(values):
+    """ICS TEXT escaping; each distinct value is escaped once."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna(''))
+    escaped = np.array([
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+        for value in uniques
+    ] + [''], dtype=object)
+    return escaped[codes]
+
+
+# THHMM00 for every minute of the day
+_ICS_TIMES = np.array([f"T{m // 60:02d}{m % 60:02d}00" for m in range(1440)], dtype=object)
+
+
+def _stamp(minutes):
+    """ICS local DATE-TIME strings for absolute minutes since the epoch."""
+    days, unique_positions = np.unique(minutes // 1440, return_inverse=True)
+    dates = pd.to_datetime(days, unit='D').strftime('%Y%m%d').to_numpy(dtype=object)
+    return dates[unique_positions] + _ICS_TIMES[minutes % 1440]
+
+
+def _uids(ids):
+    """UIDs from the entries' IDs, so an edited entry replaces its old event when re-imported
+    into a calendar instead of appearing twice."""
+    return [f"{entry_id}@timetable-app" for entry_id in ids]
+
+
+def _ics_recurrence(repeat, start):
+    """RRULE (and EXDATE) lines for a lesson's Repeat value; start is its minutes past midnight."""
+    try:
+        rule = parse_rule(repeat)
+    except ValueError:
+        return ''
+    if rule is None:
+        return ''
+    parts = [f"FREQ={rule.freq}"]
+    if rule.interval != 1:
+        parts.append(f"INTERVAL={rule.interval}")
+    if rule.weekdays:
+        parts.append("BYDAY=" + ",".join(ICS_WEEKDAYS[day] for day in rule.weekdays))
+    if rule.until is not None:
+        parts.append(f"UNTIL={_stamp(np.array([rule.until * 1440 + 1439]))[0]}")
+    if rule.count is not None:
+        parts.append(f"COUNT={rule.count}")
+    lines = "RRULE:" + ";".join(parts) + "\r\n"
+    if rule.exdates:
+        days = np.array(sorted(rule.exdates), dtype=np.int64)
+        lines += "EXDATE:" + ",".join(_stamp(days * 1440 + start)) + "\r\n"
+    return lines
+
+
+def export_ics(path, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write every lesson/exam as an event (recurring when it has a Repeat rule) and every
+    routine as a weekly (or daily) recurring event to an iCalendar file, chunk by chunk.
+    Returns the number of events written."""
+    with store.lock:
+        lessons, typed = store.lessons_between(expand=False)
+        routines, routine_typed = store.routines_typed()
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    written = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Timetable App//EN\r\n")
+        for offset in range(0, len(lessons), chunk_size):
+            rows = lessons.iloc[offset:offset + chunk_size]
+            days = typed['Date'][offset:offset + chunk_size].astype(np.int64)
+            start = typed['Start'][offset:offset + chunk_size].astype(np.int64)
+            end = typed['End'][offset:offset + chunk_size].astype(np.int64)
+            valid = (start >= 0) & (end >= 0)
+            rows, days, start, end = rows[valid], days[valid], start[valid], end[valid]
+            end = np.where(end <= start, end + 1440, end)
+            starts, ends = _stamp(days * 1440 + start), _stamp(days * 1440 + end)
+            uids = _uids(rows['ID'].to_numpy())
+            recurrences = np.full(len(rows), '', dtype=object)
+            repeats = rows['Repeat'].fillna('').to_numpy(dtype=object)
+            for position in np.flatnonzero(repeats != ''):
+                recurrences[position] = _ics_recurrence(repeats[position], int(start[position]))
+            events = [
+                f"BEGIN:VEVENT\r\nUID:{uid}\r\nDTSTAMP:{stamp}\r\nDTSTART:{s}\r\nDTEND:{e}\r\n{recurrence}"
+                f"SUMMARY:{name}\r\nCATEGORIES:{kind}\r\nLOCATION:{location}\r\nDESCRIPTION:{notes}\r\nEND:VEVENT\r\n"
+                for uid, s, e, recurrence, name, kind, location, notes in zip(
+                    uids, starts, ends, recurrences, _escape(rows['Name']), _escape(rows['Type']),
+                    _escape(rows['Location']), _escape(rows['Notes']))
+            ]
+            f.write("".join(events))
+            written += len(events)
+
+        # Routines repeat from the first matching day on or after the first lesson (or today)
+        anchor = datetime.now().date()
+        if len(lessons):
+            first = typed['Date'][0]
+            if not np.isnat(first):
+                anchor = pd.Timestamp(first).date()
+        for routine, start, end in zip(routines.itertuples(index=False), routine_typed['Start'], routine_typed['End']):
+            if start < 0 or end < 0 or (routine.Day_of_Week not in WEEKDAYS and routine.Day_of_Week != 'Everyday'):
+                continue
+            if routine.Day_of_Week == 'Everyday':
+                day, rule = anchor, "FREQ=DAILY"
+            else:
+                weekday = WEEKDAYS.index(routine.Day_of_Week)
+                day = anchor + timedelta(days=(weekday - anchor.weekday()) % 7)
+                rule = f"FREQ=WEEKLY;BYDAY={ICS_WEEKDAYS[weekday]}"
+            begin = datetime.combine(day, datetime.min.time()) + timedelta(minutes=int(start))
+            finish = begin + timedelta(minutes=int(end - start if end > start else end + 1440 - start))
+            name, notes = _escape([routine.Name, routine.Notes])
+            uid = _uids([routine.ID])[0]
+            f.write(f"BEGIN:VEVENT\r\nUID:{uid}\r\nDTSTAMP:{stamp}\r\nDTSTART:{begin:%Y%m%dT%H%M00}\r\n"
+                    f"DTEND:{finish:%Y%m%dT%H%M00}\r\nRRULE:{rule}\r\nSUMMARY:{name}\r\nCATEGORIES:Routine\r\n"
+                    f"DESCRIPTION:{notes}\r\nEND:VEVENT\r\n")
+            written += 1
+        f.write("END:VCALENDAR\r\n")
+    return written
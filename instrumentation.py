@@ -0,0 +1,154 @@
+# timetable_app/instrumentation.py
+"""Opt-in timing spans and counters for the data, reminder and GUI hot paths.
+
+Set TIMETABLE_INSTRUMENT=1 (or call enable()) to record them. While disabled, a timed()
+function costs one extra call and a flag check, and span()/count() return immediately.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# Durations kept per span for the rolling percentiles
+ROLLING_WINDOW = 200
+
+# Lines of cProfile output printed for a profiled action
+PROFILE_LINES = 25
+
+_enabled = os.environ.get('TIMETABLE_INSTRUMENT', '') not in ('', '0')
+_lock = threading.Lock()
+_spans = {}  # name -> [calls, total seconds, deque of recent seconds]
+_counters = {}
+_profile_armed = False
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def _record(name, seconds):
+    with _lock:
+        entry = _spans.get(name)
+        if entry is None:
+            entry = _spans[name] = [0, 0.0, deque(maxlen=ROLLING_WINDOW)]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2].append(seconds)
+
+
+@contextmanager
+def _timing(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - started)
+
+
+def span(name):
+    """Context manager timing its block under name (a no-op while disabled)."""
+    return _timing(name) if _enabled else nullcontext()
+
+
+def timed(name=None):
+    """Decorator timing every call of the function under name (default: its __name__)."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(label, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def count(name, amount=1):
+    """Add amount to a counter such as 'rows_scanned', 'bytes_read' or 'cache_hits'."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def snapshot():
+    """{'spans': {name: stats in ms over the rolling window}, 'counters': {...}}."""
+    with _lock:
+        spans = {}
+        for name, (calls, total, recent) in _spans.items():
+            ordered = sorted(recent)
+            spans[name] = {
+                'calls': calls,
+                'total_ms': total * 1000,
+                'last_ms': recent[-1] * 1000,
+                'p50_ms': ordered[len(ordered) // 2] * 1000,
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            }
+        return {'spans': spans, 'counters': dict(_counters)}
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def dump(path):
+    """Write snapshot() to path as JSON."""
+    with open(path, 'w') as f:
+        json.dump(snapshot(), f, indent=2)
+
+
+def summary(limit=3):
+    """One status-bar line: the slowest recent spans and the counters."""
+    stats = snapshot()
+    slowest = sorted(stats['spans'].items(), key=lambda item: item[1]['last_ms'], reverse=True)[:limit]
+    parts = [f"{name} {entry['last_ms']:.1f}ms" for name, entry in slowest]
+    parts += [f"{name} {value:,}" for name, value in sorted(stats['counters'].items())]
+    return " | ".join(parts) or "No activity recorded"
+
+
+def profile_next():
+    """Run the next action passed through call() under cProfile."""
+    global _profile_armed
+    _profile_armed = True
+
+
+def call(name, fn, *args):
+    """fn(*args), timed as name, or profiled if profile_next() was called.
+
+    The profile is printed and, when TIMETABLE_PROFILE_DIR is set, saved there as
+    <name>-<timestamp>.prof for pstats/snakeviz.
+    """
+    global _profile_armed
+    if not _profile_armed:
+        with span(name):
+            return fn(*args)
+    _profile_armed = False
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args)
+    finally:
+        directory = os.environ.get('TIMETABLE_PROFILE_DIR')
+        if directory:
+            profiler.dump_stats(os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof"))
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        print(f"Profile of {name}:\n{out.getvalue()}")
@@ -1,5 +1,10 @@
-from gui import TimetableApp
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Subcommands run headless; see cli.py
+        from cli import main
+        sys.exit(main())
+    from gui import TimetableApp
     app = TimetableApp()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
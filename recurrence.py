@@ -0,0 +1,158 @@
+# timetable_app/recurrence.py
+"""Recurrence rules for repeating lessons, and their lazy expansion into occurrence days.
+
+A rule is stored in the lessons table's Repeat column as a subset of iCalendar RRULE syntax:
+
+    FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;UNTIL=2026-05-01;COUNT=20;EXDATE=2026-03-02,2026-03-09
+
+FREQ is DAILY or WEEKLY (a bare 'daily'/'weekly' also works); BYDAY needs WEEKLY and defaults
+to the weekday of the lesson's Date, which is where the series starts. Days are counted as
+days since 1970-01-01, like data_manager's typed Date column. Standard library only, so the
+CLI can expand rules without pandas; the day and time helpers below are shared with both.
+"""
+
+from datetime import date, datetime
+
+WEEKDAY_CODES = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+FREQUENCIES = ('DAILY', 'WEEKLY')
+
+EPOCH = date(1970, 1, 1)
+
+
+def weekday(day):
+    """Weekday (0 = Monday) of a day number, or of a numpy array of them."""
+    return (day + 3) % 7  # 1970-01-01 was a Thursday
+
+
+def day_number(value):
+    """Days since 1970-01-01 for a YYYY-MM-DD string; ValueError if it is not one."""
+    try:
+        return (datetime.strptime(str(value).strip(), '%Y-%m-%d').date() - EPOCH).days
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD.") from None
+
+
+def day_text(day):
+    """YYYY-MM-DD for a day number."""
+    return date.fromordinal(EPOCH.toordinal() + day).isoformat()
+
+
+def parse_minutes(value):
+    """Minutes since midnight for an H:MM or HH:MM string (24-hour), or None if it is not one."""
+    hours, _, minutes = str(value if value is not None else '').strip().partition(':')
+    if hours.isdigit() and minutes.isdigit() and len(minutes) == 2 and int(hours) < 24 and int(minutes) < 60:
+        return int(hours) * 60 + int(minutes)
+    return None
+
+
+def _parse_day(value):
+    try:
+        return day_number(value)
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}' in repeat rule, expected YYYY-MM-DD.") from None
+
+
+class Rule:
+    """A parsed recurrence rule. until is a day number, exdates a frozenset of day numbers."""
+
+    __slots__ = ('freq', 'interval', 'weekdays', 'until', 'count', 'exdates')
+
+    def __init__(self, freq='WEEKLY', interval=1, weekdays=(), until=None, count=None, exdates=()):
+        self.freq = freq
+        self.interval = interval
+        self.weekdays = tuple(sorted(set(weekdays)))
+        self.until = until
+        self.count = count
+        self.exdates = frozenset(exdates)
+
+    def __str__(self):
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.weekdays:
+            parts.append("BYDAY=" + ",".join(WEEKDAY_CODES[day] for day in self.weekdays))
+        if self.until is not None:
+            parts.append(f"UNTIL={day_text(self.until)}")
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.exdates:
+            parts.append("EXDATE=" + ",".join(day_text(day) for day in sorted(self.exdates)))
+        return ";".join(parts)
+
+    def _layout(self, first_day):
+        """(base day, period in days, sorted day offsets within a period) of the series."""
+        if self.freq == 'DAILY':
+            return first_day, self.interval, (0,)
+        base = first_day - weekday(first_day)  # Monday of the first week
+        return base, 7 * self.interval, self.weekdays or (weekday(first_day),)
+
+    def last_day(self, first_day):
+        """Day of the final occurrence, or None when the series never ends."""
+        last = self.until
+        if self.count is not None:
+            base, period, offsets = self._layout(first_day)
+            first_period = [offset for offset in offsets if base + offset >= first_day]
+            if self.count <= len(first_period):
+                counted = base + first_period[self.count - 1]
+            else:
+                rest = self.count - len(first_period) - 1
+                counted = base + (1 + rest // len(offsets)) * period + offsets[rest % len(offsets)]
+            last = counted if last is None else min(last, counted)
+        return last
+
+    def occurrences(self, first_day, start_day, end_day):
+        """Occurrence days within start_day..end_day (inclusive), in order, generated lazily.
+
+        Expansion starts at the period containing start_day, so the cost depends on the
+        window, not on how long the series has been running.
+        """
+        base, period, offsets = self._layout(first_day)
+        last = self.last_day(first_day)
+        stop = end_day if last is None else min(end_day, last)
+        k = max(0, (start_day - base) // period)
+        while base + k * period <= stop:
+            for offset in offsets:
+                day = base + k * period + offset
+                if day > stop:
+                    return
+                if day >= first_day and day >= start_day and day not in self.exdates:
+                    yield day
+            k += 1
+
+
+def parse_rule(text):
+    """Rule for a Repeat value, or None when it is blank. Raises ValueError for a bad rule."""
+    text = str(text or '').strip()
+    if not text:
+        return None
+    parts = [part.strip() for part in text.split(';')]
+    if '=' not in parts[0]:
+        parts[0] = f"FREQ={parts[0]}"  # 'weekly;BYDAY=MO' shorthand
+    fields = {}
+    for part in filter(None, parts):
+        key, _, value = part.partition('=')
+        fields[key.strip().upper()] = value.strip()
+
+    freq = fields.pop('FREQ', '').upper()
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Invalid repeat rule '{text}', FREQ must be DAILY or WEEKLY.")
+    try:
+        interval = int(fields.pop('INTERVAL', 1))
+        count = int(fields['COUNT']) if 'COUNT' in fields else None
+    except ValueError:
+        raise ValueError(f"Invalid repeat rule '{text}', INTERVAL and COUNT must be whole numbers.") from None
+    fields.pop('COUNT', None)
+    if interval < 1 or (count is not None and count < 1):
+        raise ValueError(f"Invalid repeat rule '{text}', INTERVAL and COUNT must be at least 1.")
+    weekdays = []
+    for code in filter(None, fields.pop('BYDAY', '').upper().split(',')):
+        if code.strip() not in WEEKDAY_CODES:
+            raise ValueError(f"Invalid weekday '{code}' in repeat rule, expected MO, TU, WE, TH, FR, SA or SU.")
+        weekdays.append(WEEKDAY_CODES.index(code.strip()))
+    if weekdays and freq != 'WEEKLY':
+        raise ValueError(f"Invalid repeat rule '{text}', BYDAY needs FREQ=WEEKLY.")
+    until = _parse_day(fields.pop('UNTIL')) if 'UNTIL' in fields else None
+    exdates = [_parse_day(value) for value in filter(None, fields.pop('EXDATE', '').split(','))]
+    if fields:
+        raise ValueError(f"Invalid repeat rule '{text}', unknown part {', '.join(fields)}.")
+    return Rule(freq, interval, weekdays, until, count, exdates)
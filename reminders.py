@@ -1,10 +1,22 @@
-import schedule
-import time
-from plyer import notification
-from data_manager import get_upcoming_events, load_routines
+import heapq
+import json
+import os
+import threading
+from data_manager import get_timed_events, store
+from instrumentation import span, timed
 from datetime import datetime, timedelta
 
+# How long before an event each reminder fires
+LEAD_TIMES = [timedelta(days=1), timedelta(hours=1), timedelta(minutes=10)]
+
+# Reminders already delivered, so restarts never notify twice
+SENT_FILE = 'reminders_sent.json'
+
+# Even with nothing due, wake this often to notice CSVs edited outside the app
+POLL_INTERVAL = 60
+
 def send_notification(title, message):
+    from plyer import notification  # imported on first use so headless tools don't need it
     notification.notify(
         title=title,
         message=message,
@@ -12,31 +24,145 @@ def send_notification(title, message):
         timeout=10
     )
 
+def _minutes_since_epoch(dt):
+    return (dt - datetime(1970, 1, 1)).total_seconds() / 60
+
+
+class ReminderScheduler:
+    """Keeps a heap of precomputed reminder fire times and sleeps until the next one is due.
+
+    Events are scanned only a little further ahead than the longest lead time. When the timetable changes, the
+    reminders are recomputed for that window and diffed against the heap by key, so untouched
+    entries keep their slots and removed ones are skipped when they surface.
+    """
+
+    def __init__(self, store, lead_times=None, sent_file=SENT_FILE, notify=None):
+        self.store = store
+        self.notify = notify or send_notification
+        self.lead_times = sorted(lead_times or LEAD_TIMES, reverse=True)
+        self.horizon = max(self.lead_times) + timedelta(days=1)
+        self.sent_file = sent_file
+        self.sent = self._load_sent()
+        self._heap = []  # (fire_at minutes, key)
+        self._scheduled = {}  # key -> (fire_at, title, message)
+        self._signature = None
+        self._covered_until = None
+        self._wake = threading.Event()
+        store.subscribe(self._wake.set)
+
+    def _load_sent(self):
+        try:
+            with open(self.sent_file) as f:
+                return set(json.load(f))
+        except (FileNotFoundError, ValueError):
+            return set()
+
+    def _save_sent(self, now):
+        # Keys start with the event date; forget anything from before yesterday
+        cutoff = (now - timedelta(days=1)).strftime('%Y-%m-%d')
+        self.sent = {key for key in self.sent if key.split('|', 1)[0] >= cutoff}
+        tmp_path = self.sent_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(sorted(self.sent), f)
+        os.replace(tmp_path, self.sent_file)
+
+    def _due_reminders(self, now):
+        """key -> (fire_at, title, message) for every unsent reminder of an event in the horizon."""
+        now_minutes = _minutes_since_epoch(now)
+        events = get_timed_events(now.strftime('%Y-%m-%d'), (now + self.horizon).strftime('%Y-%m-%d'), self.store)
+        events = events[events['Start'] > now_minutes]
+        reminders = {}
+        for event in events.itertuples(index=False):
+            if event.Type == 'Routine':
+                title = "Routine Reminder"
+                when = "today" if event.Date == now.strftime('%Y-%m-%d') else f"on {event.Date}"
+                message = f"{event.Name} starts at {event.Start_Time} {when}"
+            else:
+                title = "Upcoming Event"
+                message = f"{event.Name} starts at {event.Start_Time} on {event.Date}"
+            # Leads whose fire time has already passed collapse into one immediate reminder
+            missed = None
+            for lead in self.lead_times:
+                lead_minutes = lead.total_seconds() / 60
+                key = f"{event.Date}|{event.Start_Time}|{event.Type}|{event.Name}|{int(lead_minutes)}"
+                fire_at = event.Start - lead_minutes
+                if fire_at <= now_minutes:
+                    missed = key
+                elif key not in self.sent:
+                    reminders[key] = (fire_at, title, message)
+            if missed is not None and missed not in self.sent:
+                reminders[missed] = (now_minutes, title, message)
+        return reminders
+
+    def upcoming(self, now=None):
+        """Unsent reminders for events in the horizon as (fire time, title, message), soonest first."""
+        now = now or datetime.now()
+        with self.store.lock:
+            reminders = self._due_reminders(now)
+        return sorted((datetime(1970, 1, 1) + timedelta(minutes=fire_at), title, message)
+                      for fire_at, title, message in reminders.values())
+
+    @timed('reminders.refresh')
+    def refresh(self, now=None):
+        """Recompute reminders if the timetable changed or the horizon moved on."""
+        now = now or datetime.now()
+        # Hold the store lock so a GUI write cannot land halfway through the rebuild
+        with self.store.lock:
+            signature = self.store.signature()
+            if signature == self._signature and self._covered_until and now < self._covered_until:
+                return
+            wanted = self._due_reminders(now)
+        for key in set(self._scheduled) - set(wanted):
+            del self._scheduled[key]
+        for key, entry in wanted.items():
+            if self._scheduled.get(key, (None,))[0] != entry[0]:
+                heapq.heappush(self._heap, (entry[0], key))
+            self._scheduled[key] = entry
+        self._signature = signature
+        self._covered_until = now + timedelta(days=1)
+
+    def fire_due(self, now=None):
+        """Send every reminder whose time has come. Returns minutes until the next one, or None."""
+        now = now or datetime.now()
+        now_minutes = _minutes_since_epoch(now)
+        fired = False
+        while self._heap and self._heap[0][0] <= now_minutes:
+            fire_at, key = heapq.heappop(self._heap)
+            entry = self._scheduled.get(key)
+            if entry is None or entry[0] != fire_at:
+                continue  # stale slot left behind by a change
+            del self._scheduled[key]
+            if key not in self.sent:
+                self.notify(entry[1], entry[2])
+                self.sent.add(key)
+                fired = True
+        if fired:
+            self._save_sent(now)
+        return self._heap[0][0] - now_minutes if self._heap else None
+
+    def run(self):
+        while True:
+            self._wake.clear()
+            try:
+                with span('reminders.tick'):
+                    self.refresh()
+                    wait_minutes = self.fire_due()
+            except Exception as e:
+                print(f"Reminder error: {e}")  # Log errors without crashing
+                wait_minutes = None
+            timeout = POLL_INTERVAL if wait_minutes is None else min(POLL_INTERVAL, max(wait_minutes * 60, 0))
+            self._wake.wait(timeout)
+
+
+scheduler = ReminderScheduler(store)
+
+@timed('reminders.tick')
 def check_upcoming():
     try:
-        now = datetime.now()
-        today_str = now.strftime('%Y-%m-%d')
-        today_weekday = now.strftime('%A')
-
-        # Check lessons/exams
-        upcoming = get_upcoming_events()
-        for _, event in upcoming.iterrows():
-            event_dt = datetime.strptime(f"{event['Date']} {event['Start_Time']}", '%Y-%m-%d %H:%M')
-            if timedelta(minutes=0) < event_dt - now <= timedelta(minutes=1440):
-                send_notification("Upcoming Event", f"{event['Name']} starts at {event['Start_Time']} on {event['Date']}")
-
-        # Check today's routines
-        routines_df = load_routines()
-        today_routines = routines_df[(routines_df['Day_of_Week'] == today_weekday) | (routines_df['Day_of_Week'] == 'Everyday')]
-        for _, routine in today_routines.iterrows():
-            routine_dt = datetime.strptime(f"{today_str} {routine['Start_Time']}", '%Y-%m-%d %H:%M')
-            if timedelta(minutes=0) < routine_dt - now <= timedelta(minutes=1440):
-                send_notification("Routine Reminder", f"{routine['Name']} starts at {routine['Start_Time']} today")
+        scheduler.refresh()
+        scheduler.fire_due()
     except Exception as e:
         print(f"Reminder error: {e}")  # Log errors without crashing
 
 def check_reminders():
-    schedule.every(10).minutes.do(check_upcoming)  # Or every(1).minutes for testing
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+    scheduler.run()
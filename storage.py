@@ -0,0 +1,458 @@
+# timetable_app/storage.py
+
+import csv
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import numpy as np
+import pandas as pd
+from instrumentation import count
+
+# Journal records are folded back into the base CSV once this many have accumulated
+COMPACT_EVERY = 1000
+
+# Binary snapshot kept next to each CSV (``<file>.snap``), see CsvTableStorage
+SNAPSHOT_SUFFIX = '.snap'
+SNAPSHOT_MAGIC = b'TTSNAP01'
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _atomic_write_csv(df, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='') as f:
+        df.to_csv(f, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _align(offset):
+    return -offset % 8
+
+
+def _write_snapshot(df, typed, source, path):
+    """Write df and its typed arrays as a columnar snapshot of the CSV with signature source.
+
+    Layout: magic, header length, JSON header, then 8-byte aligned blocks. String columns are
+    dictionary encoded (int32 codes, -1 for missing, plus their distinct values joined by NUL);
+    numeric and typed columns are stored as raw arrays. Returns False, writing nothing, when
+    a column cannot be encoded (e.g. a string holding a NUL).
+    """
+    blocks, columns, offset = [], [], 0
+
+    def add(data):
+        nonlocal offset
+        start = offset
+        blocks.append(data)
+        offset += len(data)
+        blocks.append(b'\0' * _align(offset))
+        offset += _align(offset)
+        return start
+
+    for name in df.columns:
+        values = df[name]
+        if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+            codes, uniques = pd.factorize(values)
+            if not all(isinstance(value, str) and '\0' not in value for value in uniques):
+                return False
+            strings = '\0'.join(uniques).encode('utf-8')
+            columns.append({'name': name, 'kind': 'strings', 'dtype': str(values.dtype),
+                            'codes': add(codes.astype(np.int32).tobytes()),
+                            'strings': [add(strings), len(strings), len(uniques)]})
+        elif values.dtype.kind in 'biuf':
+            array = values.to_numpy()
+            columns.append({'name': name, 'kind': 'array', 'dtype': array.dtype.str, 'offset': add(array.tobytes())})
+        else:
+            return False
+    arrays = {name: {'dtype': values.dtype.str, 'offset': add(np.ascontiguousarray(values).tobytes())}
+              for name, values in typed.items()}
+    header = json.dumps({'source': source, 'rows': len(df), 'columns': columns, 'typed': arrays,
+                         'data_bytes': offset}).encode('utf-8')
+    prefix = SNAPSHOT_MAGIC + struct.pack('<Q', len(header)) + header
+    prefix += b'\0' * _align(len(prefix))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(prefix)
+        f.writelines(blocks)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return True
+
+
+def _read_snapshot(path, source):
+    """(DataFrame, typed arrays) from the snapshot at path if it was written for the CSV with
+    signature source, else None.
+
+    Numeric and typed arrays are zero-copy views of the read-only mapping; string columns are
+    built from their codes, so equal strings share one object.
+    """
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):  # ValueError: empty file
+        return None
+    try:
+        if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            return None
+        start = len(SNAPSHOT_MAGIC) + 8
+        (length,) = struct.unpack_from('<Q', mapped, len(SNAPSHOT_MAGIC))
+        header = json.loads(mapped[start:start + length])
+        base = start + length + _align(start + length)
+        if header['source'] != list(source) or base + header['data_bytes'] != len(mapped):
+            return None  # stale, or torn by a crash
+        rows = header['rows']
+        data = {}
+        for column in header['columns']:
+            if column['kind'] == 'strings':
+                offset, size, distinct = column['strings']
+                text = mapped[base + offset:base + offset + size].decode('utf-8')
+                uniques = pd.array(text.split('\0') if distinct else [], dtype=column['dtype'])
+                codes = np.frombuffer(mapped, np.int32, rows, base + column['codes'])
+                data[column['name']] = uniques.take(codes, allow_fill=True)  # -1 becomes missing
+            else:
+                data[column['name']] = np.frombuffer(mapped, column['dtype'], rows, base + column['offset'])
+        typed = {name: np.frombuffer(mapped, array['dtype'], rows, base + array['offset'])
+                 for name, array in header['typed'].items()} or None
+    except (ValueError, KeyError, TypeError, struct.error):
+        return None
+    count('bytes_mapped', len(mapped))
+    return pd.DataFrame(data, columns=[column['name'] for column in header['columns']], copy=False), typed
+
+
+class CsvTableStorage:
+    """One CSV file plus its append-only journal (``<file>.journal``) and binary snapshot
+    (``<file>.snap``).
+
+    Each mutation is appended to the journal as a JSON line and fsynced, so adding an entry
+    costs one small write instead of a full rewrite. The first journal line records the
+    signature of the base CSV it applies to; a journal whose base has since been replaced
+    (e.g. by a compaction that crashed before removing it) is ignored on load.
+
+    The snapshot holds the parsed base CSV and its typed columns. It is memory-mapped instead
+    of parsing the CSV whenever it was written for the CSV's current signature, and rewritten
+    after the CSV is read or replaced, so editing the CSV by hand simply makes it stale.
+    """
+
+    def __init__(self, path, columns, typed_columns=None):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.snapshot_path = path + SNAPSHOT_SUFFIX
+        self.columns = columns
+        self.typed_columns = typed_columns or {}
+        self.journal_records = 0
+
+    def initialize(self):
+        if not os.path.exists(self.path):
+            pd.DataFrame(columns=self.columns).to_csv(self.path, index=False)
+
+    def signature(self):
+        return _signature(self.path), _signature(self.journal_path)
+
+    def read(self):
+        """The base table, its typed columns (None when they still have to be parsed), the
+        journal records still to be replayed on top of it, and whether the table came from an
+        existing snapshot rather than a fresh parse of the CSV."""
+        source = _signature(self.path)
+        snapshot = _read_snapshot(self.snapshot_path, source) if source else None
+        mapped = snapshot is not None
+        if mapped:
+            df, typed = snapshot
+        else:
+            try:
+                # Every cell stays the text it was (Location 101 must not come back as 101.0
+                # when the file is rewritten), and blanks stay '' rather than NaN
+                df = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+                count('bytes_read', os.path.getsize(self.path))
+            except (pd.errors.EmptyDataError, FileNotFoundError):
+                df = pd.DataFrame(columns=self.columns)
+            typed = self._save_snapshot(df, source) if source else None
+        records = self._read_journal()
+        self.journal_records = len(records)
+        return df, typed, records, mapped
+
+    def _save_snapshot(self, df, source):
+        """Write the snapshot for the CSV with signature source; the typed arrays it parsed for
+        it, or None when df lacks a typed column.
+
+        The snapshot is only a cache: if it cannot be written the CSV is read next time.
+        """
+        if any(column not in df for column, _ in self.typed_columns.values()):
+            typed = {}
+        else:
+            typed = {name: parser(df[column]) for name, (column, parser) in self.typed_columns.items()}
+        try:
+            _write_snapshot(df, typed, source, self.snapshot_path)
+        except OSError:
+            pass
+        return typed or None
+
+    def _read_journal(self):
+        try:
+            f = open(self.journal_path)
+        except FileNotFoundError:
+            return []
+        records = []
+        with f:
+            text = f.read()
+        count('bytes_read', len(text))
+        lines = text.splitlines()
+        if not lines:
+            return records
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return records
+        if tuple(header.get('base') or ()) != (_signature(self.path) or ()):
+            return records
+        for line in lines[1:]:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break  # torn final write from a crash
+        return records
+
+    def append(self, record):
+        if isinstance(record.get('rows'), pd.DataFrame):
+            rows = record['rows'].astype(object).where(record['rows'].notna(), None)
+            record = dict(record, rows=rows.to_dict('records'))
+        new_journal = not os.path.exists(self.journal_path)
+        with open(self.journal_path, 'a') as f:
+            if new_journal:
+                if not os.path.exists(self.path):
+                    _atomic_write_csv(pd.DataFrame(columns=self.columns), self.path)
+                f.write(json.dumps({'base': _signature(self.path)}) + '\n')
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_records += 1
+
+    def needs_compaction(self):
+        return self.journal_records >= COMPACT_EVERY
+
+    def has_changes(self):
+        return self.journal_records > 0
+
+    def append_rows(self, df):
+        """Append rows straight to the base CSV, for bulk imports that should not be held in
+        memory or journaled. Only possible while there is no journal (the CSV's signature is
+        its base) and the CSV has the expected header; returns False otherwise. The snapshot
+        goes stale and is rewritten by the next read()."""
+        self.initialize()
+        if os.path.exists(self.journal_path):
+            return False
+        with open(self.path, newline='') as f:
+            if next(csv.reader(f), None) != list(self.columns):
+                return False
+        with open(self.path, 'a', newline='') as f:
+            df[self.columns].to_csv(f, header=False, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+    def replace(self, df):
+        """Rewrite the CSV as df, dropping the journal; the typed arrays of df, or None."""
+        _atomic_write_csv(df, self.path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_records = 0
+        return self._save_snapshot(df.reset_index(drop=True), _signature(self.path))
+
+
+class CsvBackend:
+    """The original storage: one CSV per table in the working directory."""
+
+    name = 'csv'
+
+    def __init__(self, lessons_file, routines_file):
+        self.paths = {'lessons': lessons_file, 'routines': routines_file}
+
+    def table(self, name, columns, typed_columns):
+        return CsvTableStorage(self.paths[name], columns, typed_columns)
+
+
+def _sql_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+
+class SqliteTableStorage:
+    """A table in an SQLite database. Rows keep their DataFrame order via rowid and are
+    edited/deleted by their indexed ID column.
+
+    Each typed column (see data_manager.LESSON_TYPED) is also stored as an integer column
+    named ``_<name>`` -- days since the epoch for dates, minutes since midnight for times --
+    so the date/weekday/start-time indexes order correctly whatever the text looks like, and
+    read() hands them back as the typed arrays instead of parsing the text again.
+
+    Every write bumps the table's row in ``_versions`` in the same transaction; that counter
+    is the table's signature, so a write to one table never invalidates the other.
+    """
+
+    def __init__(self, backend, name, columns, typed_columns):
+        self.backend = backend
+        self.name = name
+        self.columns = columns
+        self.typed_columns = typed_columns
+
+    @property
+    def conn(self):
+        return self.backend.connect()
+
+    def initialize(self):
+        derived = [f'"_{typed}" INTEGER' for typed in self.typed_columns]
+        columns = ', '.join([f'"{column}" TEXT' for column in self.columns] + derived)
+        with self.conn:
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS {self.name} (rowid INTEGER PRIMARY KEY, {columns})')
+            # Databases created before a column was added get it now
+            existing = {row[1] for row in self.conn.execute(f'PRAGMA table_info({self.name})')}
+            for column in self.columns:
+                if column not in existing:
+                    self.conn.execute(f'ALTER TABLE {self.name} ADD COLUMN "{column}" TEXT')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS _versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            indexed = [('date', ['_Date', '_Start']), ('weekday', ['Day_of_Week']), ('start', ['_Start']), ('id', ['ID'])]
+            for suffix, keys in indexed:
+                if all(key in self.columns or key[1:] in self.typed_columns for key in keys):
+                    key_list = ', '.join(f'"{key}"' for key in keys)
+                    self.conn.execute(f'CREATE INDEX IF NOT EXISTS {self.name}_{suffix} ON {self.name} ({key_list})')
+
+    def signature(self):
+        return self.backend.version(self.name)
+
+    def _bump(self):
+        self.conn.execute('INSERT INTO _versions (name, version) VALUES (?, 1) '
+                          'ON CONFLICT (name) DO UPDATE SET version = version + 1', (self.name,))
+
+    def read(self):
+        self.initialize()
+        derived = [f'_{typed}' for typed in self.typed_columns]
+        column_list = ', '.join(f'"{column}"' for column in self.columns + derived)
+        df = pd.read_sql_query(f'SELECT {column_list} FROM {self.name} ORDER BY rowid', self.conn)
+        typed = {}
+        for name, (_, parser) in self.typed_columns.items():
+            values = df.pop(f'_{name}')
+            if parser(pd.Series([], dtype=object)).dtype.kind == 'M':
+                typed[name] = values.to_numpy(dtype='float64').astype('datetime64[D]')  # NaN -> NaT
+            else:
+                typed[name] = values.fillna(-1).to_numpy().astype(np.int16)
+        return df, typed or None, [], False
+
+    def _parse(self, df):
+        return {name: parser(df[column]) for name, (column, parser) in self.typed_columns.items()}
+
+    def _derived(self, typed_values):
+        """The typed arrays as SQL integers, None where missing."""
+        values = {}
+        for typed, parsed in typed_values.items():
+            if parsed.dtype.kind == 'M':
+                ints = parsed.astype(np.int64)
+                values[typed] = [None if missing else int(v) for v, missing in zip(ints, np.isnat(parsed))]
+            else:
+                values[typed] = [None if v < 0 else int(v) for v in parsed]
+        return values
+
+    def _insert(self, df):
+        """Insert the rows of df; returns their typed arrays."""
+        typed = self._parse(df)
+        derived = self._derived(typed)
+        names = list(self.columns) + [f'_{typed}' for typed in derived]
+        rows = zip(*([map(_sql_value, df[column]) for column in self.columns] + list(derived.values())))
+        placeholders = ', '.join('?' * len(names))
+        column_list = ', '.join(f'"{name}"' for name in names)
+        self.conn.executemany(f'INSERT INTO {self.name} ({column_list}) VALUES ({placeholders})', rows)
+        return typed
+
+    def append(self, record):
+        op = record['op']
+        with self.conn:
+            if op == 'add':
+                rows = record['rows']
+                self._insert(rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows, columns=self.columns))
+            elif op == 'edit':
+                for entry_id, row_updates in zip(record['ids'], record['updates']):
+                    updates = dict(row_updates)
+                    for typed, values in self._derived(self._parse(pd.DataFrame([updates], columns=self.columns))).items():
+                        if self.typed_columns[typed][0] in updates:
+                            updates[f'_{typed}'] = values[0]
+                    assignments = ', '.join(f'"{key}" = ?' for key in updates)
+                    self.conn.execute(f'UPDATE {self.name} SET {assignments} WHERE "ID" = ?',
+                                      [_sql_value(value) for value in updates.values()] + [entry_id])
+            elif op == 'delete':
+                self.conn.executemany(f'DELETE FROM {self.name} WHERE "ID" = ?', [(entry_id,) for entry_id in record['ids']])
+            self._bump()
+
+    def needs_compaction(self):
+        return False
+
+    def has_changes(self):
+        return False
+
+    def append_rows(self, df):
+        self.initialize()
+        with self.conn:
+            self._insert(df)
+            self._bump()
+        return True
+
+    def replace(self, df):
+        self.initialize()
+        with self.conn:
+            self.conn.execute(f'DELETE FROM {self.name}')
+            typed = self._insert(df)
+            self._bump()
+        return typed or None
+
+
+class SqliteBackend:
+    """Both tables in one SQLite database (WAL mode), with indexes on date, weekday and start time.
+
+    Every add/edit/delete (or batch of them) is its own transaction, so a write touches only
+    the affected rows.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = None
+        # Signatures are polled from other threads (e.g. reminders) without the store's lock,
+        # so they get their own connection, which also only ever sees committed versions
+        self._version_conn = None
+        self._version_lock = threading.Lock()
+
+    def connect(self):
+        if self._conn is None:
+            # Callers (TimetableStore) serialize access with their own lock
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        return self._conn
+
+    def version(self, table):
+        """Change counter of one table; None until the database and the table exist."""
+        with self._version_lock:
+            if self._version_conn is None:
+                if not os.path.exists(self.db_path):
+                    return None
+                self._version_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            try:
+                row = self._version_conn.execute('SELECT version FROM _versions WHERE name = ?', (table,)).fetchone()
+            except sqlite3.OperationalError:
+                return None  # created by a version without _versions; initialize() adds it
+            return row[0] if row else 0
+
+    def table(self, name, columns, typed_columns):
+        return SqliteTableStorage(self, name, columns, typed_columns)
@@ -0,0 +1,32 @@
+# timetable_app/tests/conftest.py
+# The app is a flat set of modules; make them importable when pytest runs from anywhere
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import TimetableStore  # noqa: E402
+from storage import CsvBackend  # noqa: E402
+
+
+def open_store(directory):
+    return TimetableStore(CsvBackend(str(directory / 'lessons_exams.csv'), str(directory / 'daily_routines.csv')))
+
+
+@pytest.fixture
+def timetable(tmp_path):
+    """An empty CSV-backed TimetableStore in a temporary directory."""
+    store = open_store(tmp_path)
+    store.initialize()
+    return store
+
+
+def lesson(name, date, start, end, repeat='', kind='Lesson'):
+    return {'Type': kind, 'Name': name, 'Date': date, 'Start_Time': start, 'End_Time': end,
+            'Day_of_Week': '', 'Location': '', 'Notes': '', 'Repeat': repeat}
+
+
+def routine(name, start, end, day):
+    return {'Name': name, 'Start_Time': start, 'End_Time': end, 'Day_of_Week': day, 'Notes': ''}
@@ -0,0 +1,41 @@
+# timetable_app/tests/test_data_manager.py
+
+import pandas as pd
+from config import LESSON_COLUMNS
+from data_manager import TimetableStore
+from storage import CsvBackend
+
+
+def _lesson(name, entry_id):
+    return {'Type': 'Lesson', 'Name': name, 'Date': '2026-03-02', 'Start_Time': '09:00', 'End_Time': '10:00',
+            'Day_of_Week': 'Monday', 'Location': '', 'Notes': '', 'Repeat': '', 'ID': entry_id}
+
+
+def _open(tmp_path):
+    return TimetableStore(CsvBackend(str(tmp_path / 'lessons_exams.csv'), str(tmp_path / 'daily_routines.csv')))
+
+
+def test_hand_copied_ids_are_refilled(tmp_path):
+    rows = [_lesson('Algebra', 'aaaa'), _lesson('Physics', 'aaaa'), _lesson('Chemistry', 'bbbb')]
+    pd.DataFrame(rows, columns=LESSON_COLUMNS).to_csv(tmp_path / 'lessons_exams.csv', index=False)
+
+    ids = _open(tmp_path).lessons()['ID'].tolist()
+    assert ids[0] == 'aaaa' and ids[2] == 'bbbb'
+    assert len(set(ids)) == 3
+
+    # The next start maps the snapshot written for the repaired CSV and keeps the same IDs
+    store = _open(tmp_path)
+    assert store.lessons()['ID'].tolist() == ids
+    store.delete_lesson('aaaa')
+    assert _open(tmp_path).lessons()['Name'].tolist() == ['Physics', 'Chemistry']
+
+
+def test_rewrite_keeps_cell_text(tmp_path):
+    rows = [_lesson('Algebra', ''), _lesson('Physics', '')]
+    rows[0]['Location'], rows[1]['Location'] = '101', ''
+    pd.DataFrame(rows, columns=LESSON_COLUMNS).to_csv(tmp_path / 'lessons_exams.csv', index=False)
+
+    _open(tmp_path).lessons()  # assigns the missing IDs, which rewrites the file
+    rewritten = pd.read_csv(tmp_path / 'lessons_exams.csv', dtype=str, keep_default_na=False)
+    assert rewritten['Location'].tolist() == ['101', '']
+    assert rewritten['Start_Time'].tolist() == ['09:00', '09:00']
@@ -0,0 +1,67 @@
+# timetable_app/tests/test_free_slots.py
+
+import numpy as np
+from conftest import lesson, open_store, routine
+from data_manager import day_number
+
+MONDAY = day_number('2026-03-02')
+WEEK = (MONDAY, MONDAY + 6)
+
+
+def _cached(timetable):
+    """Fill the busy cache for the week and return it."""
+    timetable.busy(*WEEK)
+    assert set(timetable._busy) == set(range(WEEK[0], WEEK[1] + 1))
+    return timetable
+
+
+def _matches_fresh(timetable, tmp_path):
+    assert np.array_equal(timetable.busy(*WEEK), open_store(tmp_path).busy(*WEEK))
+
+
+def _seed(timetable):
+    timetable.add_lessons([lesson('Algebra', '2026-03-03', '09:00', '10:00'),
+                           lesson('Physics', '2026-03-05', '13:00', '14:00')])
+    timetable.add_routines([routine('Gym', '18:00', '19:00', 'Monday')])
+    return timetable.lessons()['ID'].tolist()
+
+
+def test_moving_a_lesson_drops_its_old_and_new_day(timetable, tmp_path):
+    algebra, _ = _seed(timetable)
+    _cached(timetable).edit_lesson(algebra, {'Date': '2026-03-06'})
+    assert set(timetable._busy) == set(range(WEEK[0], WEEK[1] + 1)) - {MONDAY + 1, MONDAY + 4}
+    _matches_fresh(timetable, tmp_path)
+
+
+def test_adding_and_deleting_drop_only_their_day(timetable, tmp_path):
+    _, physics = _seed(timetable)
+    _cached(timetable).add_lessons([lesson('Talk', '2026-03-07', '12:00', '13:00')])
+    timetable.delete_lesson(physics)
+    assert set(timetable._busy) == set(range(WEEK[0], WEEK[1] + 1)) - {MONDAY + 3, MONDAY + 5}
+    _matches_fresh(timetable, tmp_path)
+
+
+def test_making_a_lesson_repeat_drops_every_day(timetable, tmp_path):
+    algebra, _ = _seed(timetable)
+    _cached(timetable).edit_lesson(algebra, {'Repeat': 'FREQ=WEEKLY;BYDAY=TU,TH'})
+    assert timetable._busy == {}
+    _matches_fresh(timetable, tmp_path)
+
+
+def test_routine_change_drops_every_day(timetable, tmp_path):
+    _seed(timetable)
+    gym = timetable.routines()['ID'].iloc[0]
+    _cached(timetable).edit_routine(gym, {'Day_of_Week': 'Everyday'})
+    assert timetable._busy == {}
+    _matches_fresh(timetable, tmp_path)
+
+
+def test_external_change_drops_every_day(timetable, tmp_path):
+    _seed(timetable)
+    generation = timetable._table('lessons').generation
+    _cached(timetable).busy(MONDAY + 20, MONDAY + 20)  # a day outside the week as well
+
+    open_store(tmp_path).add_lessons([lesson('Seminar', '2026-03-04', '15:00', '16:00')])
+    _matches_fresh(timetable, tmp_path)
+    assert timetable._table('lessons').generation > generation
+    assert set(timetable._busy) == set(range(WEEK[0], WEEK[1] + 1))
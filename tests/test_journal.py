@@ -0,0 +1,104 @@
+# timetable_app/tests/test_journal.py
+
+import json
+import os
+import numpy as np
+import pandas as pd
+import storage
+from conftest import lesson, open_store
+from config import LESSON_COLUMNS
+
+
+def _journal(tmp_path):
+    return str(tmp_path / 'lessons_exams.csv') + '.journal'
+
+
+def _names(store):
+    return store.lessons()['Name'].tolist()
+
+
+def test_cold_load_replays_the_journal(timetable, tmp_path):
+    timetable.add_lessons([lesson('Algebra', '2026-03-02', '09:00', '10:00'),
+                           lesson('Physics', '2026-03-03', '09:00', '10:00'),
+                           lesson('Chemistry', '2026-03-04', '09:00', '10:00')])
+    ids = timetable.lessons()['ID'].tolist()
+    timetable.edit_lesson(ids[0], {'Name': 'Geometry', 'Start_Time': '08:00'})
+    timetable.delete_lesson(ids[1])
+    assert os.path.exists(_journal(tmp_path))
+
+    fresh = open_store(tmp_path)
+    pd.testing.assert_frame_equal(fresh.lessons(), timetable.lessons())
+    assert fresh.lessons_between()[1]['Start'].tolist() == [480, 540]
+
+
+def test_journal_for_a_replaced_base_is_ignored(timetable, tmp_path):
+    timetable.add_lessons([lesson('Algebra', '2026-03-02', '09:00', '10:00')])
+    with open(_journal(tmp_path)) as f:
+        journal = f.read()
+    # A compaction that rewrote the CSV but crashed before removing the journal
+    timetable.compact()
+    with open(_journal(tmp_path), 'w') as f:
+        f.write(journal)
+    assert _names(open_store(tmp_path)) == ['Algebra']
+
+
+def test_torn_final_line_is_dropped(timetable, tmp_path):
+    timetable.add_lessons([lesson('Algebra', '2026-03-02', '09:00', '10:00')])
+    timetable.add_lessons([lesson('Physics', '2026-03-03', '09:00', '10:00')])
+    with open(_journal(tmp_path)) as f:
+        lines = f.read().splitlines()
+    with open(_journal(tmp_path), 'w') as f:
+        f.write('\n'.join(lines[:-1] + [lines[-1][:len(lines[-1]) // 2]]))
+    assert _names(open_store(tmp_path)) == ['Algebra']
+
+
+def test_journal_is_compacted_after_compact_every_records(timetable, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'COMPACT_EVERY', 3)
+    for name in ('Algebra', 'Physics'):
+        timetable.add_lessons([lesson(name, '2026-03-02', '09:00', '10:00')])
+    assert os.path.exists(_journal(tmp_path))
+    timetable.add_lessons([lesson('Chemistry', '2026-03-02', '09:00', '10:00')])
+    assert not os.path.exists(_journal(tmp_path))
+
+    on_disk = pd.read_csv(tmp_path / 'lessons_exams.csv', dtype=str, keep_default_na=False)
+    assert on_disk['Name'].tolist() == ['Algebra', 'Physics', 'Chemistry']
+    pd.testing.assert_frame_equal(open_store(tmp_path).lessons(), timetable.lessons())
+
+
+def test_positional_records_from_old_journals(tmp_path):
+    # A CSV from before entries had IDs, with a journal that addresses rows by position
+    rows = [lesson('Algebra', '2026-03-02', '09:00', '10:00'), lesson('Physics', '2026-03-03', '09:00', '10:00'),
+            lesson('Chemistry', '2026-03-04', '09:00', '10:00')]
+    columns = [column for column in LESSON_COLUMNS if column != 'ID']
+    pd.DataFrame(rows, columns=columns).to_csv(tmp_path / 'lessons_exams.csv', index=False)
+    records = [{'base': storage._signature(str(tmp_path / 'lessons_exams.csv'))},
+               {'op': 'edit', 'index': 2, 'updates': {'Name': 'Biology', 'Start_Time': '11:00'}},
+               {'op': 'delete', 'index': 0}]
+    with open(_journal(tmp_path), 'w') as f:
+        f.write(''.join(json.dumps(record) + '\n' for record in records))
+
+    store = open_store(tmp_path)
+    lessons = store.lessons()
+    assert lessons['Name'].tolist() == ['Physics', 'Biology']
+    assert lessons['Start_Time'].tolist() == ['09:00', '11:00']
+    assert lessons['ID'].str.len().gt(0).all()
+    # The replayed rows got their IDs persisted, and the journal was folded into the CSV
+    assert not os.path.exists(_journal(tmp_path))
+    assert open_store(tmp_path).lessons()['ID'].tolist() == lessons['ID'].tolist()
+
+
+def test_compaction_keeps_typed_columns_and_index(timetable, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'COMPACT_EVERY', 2)
+    timetable.add_lessons([lesson('Algebra', '2026-03-03', '09:00', '10:00')])
+    timetable.lessons_between()  # builds the typed columns and the date index
+    table = timetable._table('lessons')
+    index = table.index()
+    timetable.add_lessons([lesson('Physics', '2026-03-02', '13:00', '14:00')])
+    assert not os.path.exists(_journal(tmp_path))
+
+    assert table._typed is not None and table._index is index
+    lessons, typed = timetable.lessons_between()
+    fresh_lessons, fresh_typed = open_store(tmp_path).lessons_between()
+    pd.testing.assert_frame_equal(lessons, fresh_lessons)
+    for name, values in fresh_typed.items():
+        assert np.array_equal(typed[name], values)
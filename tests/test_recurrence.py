@@ -0,0 +1,76 @@
+# timetable_app/tests/test_recurrence.py
+
+import pytest
+from conftest import lesson
+from recurrence import day_number, day_text, parse_rule, weekday
+
+
+def _expand(rule, first_day, end_day):
+    """Occurrence days up to end_day by walking every day from the first one."""
+    base = first_day - weekday(first_day)
+    weekdays = rule.weekdays or (weekday(first_day),)
+    days, counted = [], 0
+    for day in range(first_day, end_day + 1):
+        if rule.freq == 'DAILY':
+            matches = (day - first_day) % rule.interval == 0
+        else:
+            matches = weekday(day) in weekdays and (day - base) // 7 % rule.interval == 0
+        if not matches:
+            continue
+        if (rule.until is not None and day > rule.until) or (rule.count is not None and counted == rule.count):
+            break
+        counted += 1  # EXDATE still uses up a COUNT slot, as in iCalendar
+        if day not in rule.exdates:
+            days.append(day)
+    return days
+
+
+@pytest.mark.parametrize('text, first', [
+    ('FREQ=WEEKLY;BYDAY=MO,WE;COUNT=5', '2026-03-05'),  # a Thursday, not in BYDAY
+    ('FREQ=WEEKLY;BYDAY=TU,FR;COUNT=1', '2026-03-05'),
+    ('FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR;COUNT=7', '2026-03-04'),
+    ('FREQ=WEEKLY;INTERVAL=3;COUNT=4', '2026-03-02'),
+    ('FREQ=DAILY;INTERVAL=3;COUNT=6', '2026-03-02'),
+    ('FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=6;EXDATE=2026-03-04,2026-03-09', '2026-03-02'),
+    ('FREQ=WEEKLY;INTERVAL=2;BYDAY=TU;UNTIL=2026-05-01;COUNT=50', '2026-03-03'),
+    ('FREQ=DAILY;UNTIL=2026-03-20;EXDATE=2026-03-10', '2026-03-02'),
+])
+def test_rule_matches_day_by_day_expansion(text, first):
+    rule, first_day = parse_rule(text), day_number(first)
+    expected = _expand(rule, first_day, first_day + 400)
+    assert list(rule.occurrences(first_day, first_day - 10, first_day + 400)) == expected
+    assert rule.last_day(first_day) >= expected[-1]
+    # A window starting mid-series sees the same days from there on
+    middle = expected[len(expected) // 2]
+    assert list(rule.occurrences(first_day, middle, first_day + 400)) == [day for day in expected if day >= middle]
+
+
+def test_count_includes_excluded_dates():
+    rule = parse_rule('FREQ=DAILY;COUNT=3;EXDATE=2026-03-03')
+    days = rule.occurrences(day_number('2026-03-02'), day_number('2026-03-01'), day_number('2026-03-31'))
+    assert [day_text(day) for day in days] == ['2026-03-02', '2026-03-04']
+    assert day_text(rule.last_day(day_number('2026-03-02'))) == '2026-03-04'
+
+
+def test_last_day_of_count_starting_off_byday():
+    # Thursday start, Monday/Wednesday rule: the occurrences are the 9th, 11th and 16th
+    rule = parse_rule('FREQ=WEEKLY;BYDAY=MO,WE;COUNT=3')
+    assert day_text(rule.last_day(day_number('2026-03-05'))) == '2026-03-16'
+    assert parse_rule('weekly').last_day(day_number('2026-03-05')) is None
+
+
+def test_lessons_between_limit_merges_repeating_lessons(timetable):
+    timetable.add_lessons([
+        lesson('Maths', '2026-03-02', '09:00', '10:00', repeat='FREQ=WEEKLY;BYDAY=MO,WE;COUNT=6'),
+        lesson('Exam', '2026-03-04', '08:00', '09:00', kind='Exam'),
+        lesson('Talk', '2026-03-09', '12:00', '13:00'),
+    ])
+    start, end = day_number('2026-03-03'), day_number('2026-03-31')
+    everything, _ = timetable.lessons_between(start, end)
+    assert list(zip(everything['Name'], everything['Date'])) == [
+        ('Exam', '2026-03-04'), ('Maths', '2026-03-04'), ('Maths', '2026-03-09'), ('Talk', '2026-03-09'),
+        ('Maths', '2026-03-11'), ('Maths', '2026-03-16'), ('Maths', '2026-03-18')]
+    for limit in range(len(everything) + 2):
+        lessons, typed = timetable.lessons_between(start, end, limit=limit)
+        assert lessons['Date'].tolist() == everything['Date'].tolist()[:limit]
+        assert [day_text(int(day)) for day in typed['Date'].astype(int)] == lessons['Date'].tolist()
@@ -0,0 +1,104 @@
+# timetable_app/workers.py
+
+import queue
+import traceback
+import instrumentation
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundRunner:
+    """Runs data_manager calls off the Tk main loop and delivers results back on it.
+
+    Each read is submitted under a key (e.g. 'view'); submitting again under the same key
+    supersedes the earlier call, whose result is then dropped (and which is cancelled outright
+    if it has not started yet). Reads share a small pool; writes go through a single worker
+    so they apply in the order they were made. Results are handed over through a queue that
+    the Tk thread drains with after(), since Tk widgets must only be touched from that thread.
+    """
+
+    def __init__(self, root, on_busy=None, read_workers=2, poll_ms=50):
+        self.root = root
+        self.on_busy = on_busy
+        self.poll_ms = poll_ms
+        self._reads = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix='timetable-read')
+        self._writes = ThreadPoolExecutor(max_workers=1, thread_name_prefix='timetable-write')
+        self._results = queue.Queue()
+        self._latest = {}  # key -> (generation, future)
+        self._generation = 0
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, key, fn, *args, on_done=None, on_error=None, write=False):
+        """Run fn(*args) in the background, then on_done(result) or on_error(exc) on the Tk thread."""
+        self._generation += 1
+        generation = self._generation
+        if write:
+            key = (key, generation)  # every write must land, so none supersedes another
+        previous = self._latest.get(key)
+        if previous is not None and previous[1].cancel():
+            self._finished()
+        executor = self._writes if write else self._reads
+        name = key[0] if isinstance(key, tuple) else key
+
+        def run():
+            try:
+                result = instrumentation.call(f'job.{name}', fn, *args)
+                self._results.put((key, generation, True, result, on_done, on_error))
+            except Exception as e:
+                self._results.put((key, generation, False, e, on_done, on_error))
+
+        self._latest[key] = (generation, executor.submit(run))
+        self._started()
+
+    def cancel(self, key):
+        """Drop the pending read under key: cancelled if it has not started, else its result
+        is discarded when it arrives."""
+        previous = self._latest.pop(key, None)
+        if previous is not None and previous[1].cancel():
+            self._finished()
+
+    def _started(self):
+        self._pending += 1
+        if self._pending == 1 and self.on_busy:
+            self.on_busy(True)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._drain)
+
+    def _finished(self):
+        self._pending -= 1
+        if self._pending == 0 and self.on_busy:
+            self.on_busy(False)
+
+    def _drain(self):
+        try:
+            while True:
+                try:
+                    key, generation, ok, value, on_done, on_error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._finished()
+                latest = self._latest.get(key)
+                if latest is None or latest[0] != generation:
+                    continue  # superseded by a newer request under the same key
+                del self._latest[key]
+                try:
+                    if ok and on_done:
+                        with instrumentation.span(f'ui.{key[0] if isinstance(key, tuple) else key}'):
+                            on_done(value)
+                    elif not ok:
+                        if on_error:
+                            on_error(value)
+                        else:
+                            print(f"Background error in {key}: {value}")
+                except Exception:  # a failing callback must not stop the delivery of later results
+                    traceback.print_exc()
+        finally:
+            if self._pending:
+                self.root.after(self.poll_ms, self._drain)
+            else:
+                self._polling = False
+
+    def shutdown(self):
+        self._reads.shutdown(wait=False, cancel_futures=True)
+        self._writes.shutdown(wait=True)
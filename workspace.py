@@ -0,0 +1,136 @@
+# timetable_app/workspace.py
+"""A directory of timetables (one per student or room) and batch operations across them.
+
+Each timetable is a subdirectory holding its own lessons_exams.csv/daily_routines.csv (or
+timetable.db), e.g. ``rooms/G15/``. Batch operations open each timetable in a worker process
+and stream (name, result) pairs back in completion order, so the first results arrive while
+the rest are still being processed and the work spreads over every core.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import pandas as pd
+from config import DATABASE_FILE, LESSONS_FILE, ROUTINES_FILE
+from data_manager import CONFLICT_COLUMNS, TimetableStore, busy_between, find_conflicts, free_slots_in
+from storage import CsvBackend, SqliteBackend
+
+# Timetables handed to a worker at a time; larger batches cut inter-process overhead,
+# smaller ones start streaming sooner
+BATCH_SIZE = 16
+
+
+def open_timetable(directory):
+    """TimetableStore for one timetable directory: SQLite when it has a database, else CSV."""
+    if os.path.exists(os.path.join(directory, DATABASE_FILE)):
+        return TimetableStore(SqliteBackend(os.path.join(directory, DATABASE_FILE)))
+    return TimetableStore(CsvBackend(os.path.join(directory, LESSONS_FILE), os.path.join(directory, ROUTINES_FILE)))
+
+
+def _run_batch(task, directories, args):
+    """Worker side: run task(directory, *args) for every timetable of one batch."""
+    results = []
+    for name, directory in directories:
+        try:
+            results.append((name, task(directory, *args), None))
+        except Exception as e:  # one broken timetable must not sink the batch
+            results.append((name, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _conflicts(directory, start_date, end_date):
+    return find_conflicts(start_date, end_date, open_timetable(directory))
+
+
+def _busy(directory, start_date, end_date):
+    return busy_between(start_date, end_date, open_timetable(directory))
+
+
+def _reminders(directory, now, lead_times):
+    from reminders import SENT_FILE, ReminderScheduler
+    scheduler = ReminderScheduler(open_timetable(directory), lead_times, os.path.join(directory, SENT_FILE))
+    return scheduler.upcoming(now)
+
+
+class Workspace:
+    """The timetables under one root directory."""
+
+    def __init__(self, root, processes=None):
+        self.root = root
+        self.processes = processes or os.cpu_count() or 1
+
+    def names(self):
+        """Timetable names (subdirectory names), sorted."""
+        with os.scandir(self.root) as entries:
+            return sorted(entry.name for entry in entries if entry.is_dir() and not entry.name.startswith('.'))
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def create(self, name):
+        """Add an empty timetable and return its store."""
+        os.makedirs(self.path(name))
+        timetable = open_timetable(self.path(name))
+        timetable.initialize()
+        return timetable
+
+    def open(self, name):
+        if not os.path.isdir(self.path(name)):
+            raise ValueError(f"No timetable named '{name}' in {self.root}.")
+        return open_timetable(self.path(name))
+
+    def run(self, task, *args, names=None):
+        """Yield (name, result, error) for task(directory, *args) over the timetables, as they finish.
+
+        task must be a module-level function so it can be sent to the worker processes; it
+        typically starts with open_timetable(directory). error is None on success, else a
+        message (and result is None).
+        """
+        names = self.names() if names is None else list(names)
+        jobs = [(name, self.path(name)) for name in names]
+        batches = [jobs[i:i + BATCH_SIZE] for i in range(0, len(jobs), BATCH_SIZE)]
+        if self.processes == 1 or len(batches) <= 1:
+            for batch in batches:
+                yield from _run_batch(task, batch, args)
+            return
+        with ProcessPoolExecutor(max_workers=min(self.processes, len(batches))) as pool:
+            futures = [pool.submit(_run_batch, task, batch, args) for batch in batches]
+            try:
+                for future in as_completed(futures):
+                    yield from future.result()
+            finally:
+                for future in futures:  # the caller stopped early: drop what has not started
+                    future.cancel()
+
+    def scan_conflicts(self, start_date=None, end_date=None, names=None):
+        """Yield (name, conflicts DataFrame, error) for every timetable, as each scan finishes."""
+        return self.run(_conflicts, start_date, end_date, names=names)
+
+    def upcoming_reminders(self, now=None, lead_times=None, names=None):
+        """Yield (name, [(fire time, title, message), ...], error) of the unsent reminders of
+        every timetable, as each one finishes; each timetable keeps its own sent file."""
+        now = now or datetime.now()
+        return self.run(_reminders, now, lead_times, names=names)
+
+    def conflicts_frame(self, start_date=None, end_date=None, names=None):
+        """All conflicts of the workspace merged into one DataFrame with a Timetable column."""
+        frames = [conflicts.assign(Timetable=name) for name, conflicts, error in
+                  self.scan_conflicts(start_date, end_date, names) if error is None and not conflicts.empty]
+        if not frames:
+            return pd.DataFrame(columns=['Timetable'] + CONFLICT_COLUMNS)
+        merged = pd.concat(frames, ignore_index=True)
+        return merged[['Timetable'] + CONFLICT_COLUMNS].sort_values(['Timetable', 'Date'], kind='stable', ignore_index=True)
+
+    def find_free_slots(self, start_date, end_date=None, duration=60, constraints=None, names=None):
+        """Slots free in every timetable at once (e.g. a meeting for a whole group), as a
+        DataFrame like data_manager.find_free_slots(). Each worker sends back its packed
+        per-minute occupancy and the bits are OR-ed together here, so the merge costs
+        180 bytes per day per timetable."""
+        busy = None
+        for name, packed, error in self.run(_busy, start_date, end_date, names=names):
+            if error is not None:  # a slot is only free if it is free everywhere
+                raise ValueError(f"Cannot read timetable '{name}': {error}")
+            busy = packed if busy is None else busy | packed
+        if busy is None:
+            raise ValueError(f"No timetables to search in {self.root}.")
+        return free_slots_in(busy, start_date, duration, constraints)